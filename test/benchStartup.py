@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+#
+# Copyright 2017-2018 Government of Canada - Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Measure the import time of each vonx module in a fresh interpreter, and optionally
+the time from launching an application to a successful response from /health
+
+    python test/benchStartup.py
+    python test/benchStartup.py --command "python -m test.testIssuer"
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+MODULES = [
+    "vonx",
+    "vonx.common.config",
+    "vonx.common.exchange",
+    "vonx.common.service",
+    "vonx.common.manager",
+    "vonx.common.dependencies",
+    "vonx.indy.messages",
+    "vonx.indy.client",
+    "vonx.indy.config",
+    "vonx.indy.service",
+    "vonx.indy.manager",
+    "vonx.web",
+    "vonx.web.views",
+]
+
+HEAVY_MODULES = [
+    "aiohttp",
+    "aiohttp_jinja2",
+    "didauth",
+    "indy",
+    "jinja2",
+    "networkx",
+    "pkg_resources",
+    "von_anchor",
+]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "elapsed": elapsed,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def time_import(module: str, runs: int) -> dict:
+    """
+    Import a module in a new interpreter several times, returning the best time
+    """
+    best = None
+    loaded = []
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-c", IMPORT_SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if proc.returncode:
+            error = proc.stderr.strip().splitlines()
+            return {"error": error[-1] if error else "exit code {}".format(proc.returncode)}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or result["elapsed"] < best:
+            best = result["elapsed"]
+        loaded = result["loaded"]
+    return {"elapsed": best, "loaded": loaded}
+
+
+def time_health(command: str, url: str, timeout: float) -> float:
+    """
+    Launch the application and poll the health endpoint until it responds with 200
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, shell=True, stdout=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError("Application exited with code {}".format(proc.returncode))
+            try:
+                with urllib.request.urlopen(url, timeout=2) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("Timed out waiting for {}".format(url))
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=MODULES,
+                        help="the modules to import (default: all vonx modules)")
+    parser.add_argument("--runs", type=int, default=5,
+                        help="the number of times to import each module")
+    parser.add_argument("--command", help="the command used to launch the application")
+    parser.add_argument("--url", default="http://localhost:5000/health",
+                        help="the health check address")
+    parser.add_argument("--timeout", type=float, default=300,
+                        help="the maximum number of seconds to wait for the health check")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    os.environ["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [root, os.environ.get("PYTHONPATH")]))
+
+    print("{:<28} {:>10}  {}".format("module", "import ms", "heavy modules loaded"))
+    for module in args.modules:
+        result = time_import(module, args.runs)
+        if "error" in result:
+            print("{:<28} {:>10}  {}".format(module, "-", result["error"]))
+        else:
+            print("{:<28} {:>10.1f}  {}".format(
+                module, result["elapsed"] * 1000, ", ".join(result["loaded"]) or "-"))
+
+    if args.command:
+        elapsed = time_health(args.command, args.url, args.timeout)
+        print("launch to healthy: {:.2f} s".format(elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Tests for the TTLCache used by the services
+
+    python -m unittest test.testCache
+"""
+
+import asyncio
+import unittest
+
+from vonx.common.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.calls = 0
+
+    def tearDown(self):
+        self.loop.close()
+
+    def lookup(self, cache, key, value, ttl=None):
+        async def loader():
+            self.calls += 1
+            return value
+        return self.loop.run_until_complete(cache.get_or_load(key, loader, ttl))
+
+    def test_negative_entry_loaded_once(self):
+        cache = TTLCache(100, 600, 120)
+        negative_ttl = lambda found: None if found else 60
+        for _ in range(20):
+            self.assertIsNone(self.lookup(cache, "did", None, negative_ttl))
+            # allow any background refresh to run
+            self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cache.refreshes, 0)
+        self.assertEqual(cache.stats["hits"], 19)
+
+    def test_zero_lifetime_not_retained(self):
+        cache = TTLCache(100, 600)
+        retry = lambda result: 0 if result == "partial" else None
+        self.assertEqual(self.lookup(cache, "key", "partial", retry), "partial")
+        self.assertEqual(self.lookup(cache, "key", "issued", retry), "issued")
+        self.assertEqual(self.lookup(cache, "key", "again", retry), "issued")
+        self.assertEqual(self.calls, 2)
+
+    def test_entry_refreshed_within_window(self):
+        cache = TTLCache(100, 600, 0.05)
+        cache.set("did", "old", 0.1)
+        self.loop.run_until_complete(asyncio.sleep(0.06))
+        self.assertEqual(self.lookup(cache, "did", "new"), "old")
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cache.get("did"), "new")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -142,6 +142,11 @@ class TestIndyIssuer(IndyManager):
 
 
 def test_web(manager):
+    if os.environ.get("WEB_WORKERS"):
+        from vonx.web.prefork import run_prefork
+        run_prefork(manager, host='0.0.0.0', port=5000)
+        return
+
     from vonx.web import init_web
     app = init_web(manager)
 
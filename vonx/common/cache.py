@@ -0,0 +1,215 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Bounded in-memory caches used by services to retain results between requests
+"""
+
+import asyncio
+from collections import OrderedDict
+import time
+from typing import Awaitable, Callable
+
+
+def _ignore_result(future: asyncio.Future) -> None:
+    """
+    Retrieve the exception of a background load so that it is not reported as unhandled
+    """
+    if not future.cancelled():
+        future.exception()
+
+
+class TTLCache:
+    """
+    A bounded mapping which discards the least recently used entries once full,
+    and entries which have outlived their time-to-live
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = None, refresh: float = None):
+        """
+        Args:
+            max_size: the maximum number of entries retained, or zero for no limit
+            ttl: the default number of seconds before an entry expires, or None
+            refresh: when an entry fetched by `get_or_load` will expire within this
+                number of seconds, reload it in the background. Entries stored with
+                a lifetime no longer than this period are never refreshed
+        """
+        self._entries = OrderedDict()
+        self._max_size = max_size
+        self._pending = {}
+        self._refresh = refresh
+        self._ttl = ttl
+        self.hits = 0
+        self.joined = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    @property
+    def max_size(self) -> int:
+        """
+        Accessor for the maximum number of entries retained
+        """
+        return self._max_size
+
+    @property
+    def ttl(self) -> float:
+        """
+        Accessor for the default entry lifetime in seconds
+        """
+        return self._ttl
+
+    def _lookup(self, key):
+        """
+        Find an unexpired entry, discarding it if it has expired
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            else:
+                self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key, defval=None):
+        """
+        Fetch a value from the cache
+
+        Args:
+            key: the cache key
+            defval: the value to return if the entry is missing or expired
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return defval
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl: float = None) -> None:
+        """
+        Add or replace a value in the cache
+
+        Args:
+            key: the cache key
+            value: the value to be stored
+            ttl: an optional override for the default entry lifetime. A lifetime
+                of zero removes any existing entry instead of storing the value
+        """
+        if ttl is None:
+            ttl = self._ttl
+        if ttl is not None and ttl <= 0:
+            self._entries.pop(key, None)
+            return
+        expiry = time.time() + ttl if ttl is not None else None
+        refresh_at = None
+        if self._refresh and ttl is not None and ttl > self._refresh:
+            refresh_at = expiry - self._refresh
+        self._entries[key] = (expiry, value, refresh_at)
+        self._entries.move_to_end(key)
+        if self._max_size:
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    async def get_or_load(self, key, loader: Callable[[], Awaitable], ttl: float = None):
+        """
+        Fetch a value from the cache, or load and store it using an async function.
+        Concurrent requests for the same missing key share a single call to the loader,
+        and exceptions raised by the loader are passed to each caller without being cached
+
+        Args:
+            key: the cache key
+            loader: a function returning an awaitable which resolves to the value
+            ttl: an optional override for the default entry lifetime, or a function
+                accepting the loaded value and returning the lifetime
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            if entry[2] is not None and key not in self._pending \
+                    and entry[2] <= time.time():
+                self.refreshes += 1
+                future = asyncio.ensure_future(self._load(key, loader, ttl))
+                future.add_done_callback(_ignore_result)
+                self._pending[key] = future
+            return entry[1]
+        future = self._pending.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(self._load(key, loader, ttl))
+            self._pending[key] = future
+        else:
+            self.joined += 1
+        return await asyncio.shield(future)
+
+    async def _load(self, key, loader: Callable[[], Awaitable], ttl: float = None):
+        """
+        Run the loader for a missing cache key and store the result
+        """
+        try:
+            value = await loader()
+            self.set(key, value, ttl(value) if callable(ttl) else ttl)
+            return value
+        finally:
+            del self._pending[key]
+
+    def remove(self, key) -> bool:
+        """
+        Remove an entry from the cache
+
+        Returns:
+            True if the entry was present
+        """
+        return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache
+        """
+        self._entries.clear()
+
+    def prune(self) -> None:
+        """
+        Discard all expired entries
+        """
+        now = time.time()
+        expired = [key for key, entry in self._entries.items()
+                   if entry[0] is not None and entry[0] <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def __contains__(self, key) -> bool:
+        return self._lookup(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Get the current size and hit rate of the cache
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "joined": self.joined,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hit_rate": self.hits / total if total else None,
+        }
@@ -0,0 +1,129 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Combining of concurrent requests into batches which are processed together
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Sequence
+
+
+class _CoalesceGroup:
+    """
+    The queued requests and in-progress batches for a single key
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.queue = []
+        self.timer = None
+
+
+class RequestCoalescer:
+    """
+    Collects concurrent requests sharing the same key into batches. When no batch is
+    in progress for a key, a request is dispatched immediately. Otherwise requests are
+    held until the delay has elapsed or the maximum batch size is reached, so batching
+    only adds latency when the handler is already busy.
+    """
+
+    def __init__(self, handler: Callable[[object, Sequence], Awaitable[Sequence]],
+                 delay: float = 0.005, max_size: int = 50):
+        """
+        Args:
+            handler: an async function accepting the key and a list of items, and
+                returning a list of results in the same order. Results which are
+                exception instances are raised to the caller
+            delay: the maximum number of seconds to hold a request
+            max_size: the maximum number of items in a batch
+        """
+        self._delay = delay
+        self._groups = {}
+        self._handler = handler
+        self._max_size = max(max_size, 1)
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, key, item):
+        """
+        Add an item to the next batch for a key and wait for its result
+
+        Args:
+            key: the key identifying compatible requests
+            item: the request to be processed
+        """
+        loop = asyncio.get_event_loop()
+        group = self._groups.get(key)
+        if not group:
+            group = self._groups[key] = _CoalesceGroup()
+        future = loop.create_future()
+        group.queue.append((item, future))
+        if not group.active or len(group.queue) >= self._max_size:
+            self._flush(key, group)
+        elif not group.timer:
+            group.timer = loop.call_later(self._delay, self._flush, key, group)
+        return await future
+
+    def _flush(self, key, group: _CoalesceGroup) -> None:
+        """
+        Dispatch the queued items for a key
+        """
+        if group.timer:
+            group.timer.cancel()
+            group.timer = None
+        while group.queue:
+            batch = group.queue[:self._max_size]
+            group.queue = group.queue[self._max_size:]
+            group.active += 1
+            asyncio.ensure_future(self._run(key, group, batch))
+
+    async def _run(self, key, group: _CoalesceGroup, batch: Sequence) -> None:
+        """
+        Process a batch of items and pass the results back to each caller
+        """
+        #pylint: disable=broad-except
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self._handler(key, [row[0] for row in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            group.active -= 1
+            if not group.active and not group.queue and self._groups.get(key) is group:
+                del self._groups[key]
+        for idx, (_item, future) in enumerate(batch):
+            if future.done():
+                continue
+            if idx >= len(results):
+                future.set_exception(ValueError("Missing result for batched request"))
+            elif isinstance(results[idx], Exception):
+                future.set_exception(results[idx])
+            else:
+                future.set_result(results[idx])
+
+    @property
+    def stats(self) -> dict:
+        """
+        Get the number of batches processed and the average batch size
+        """
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_size": self.items / self.batches if self.batches else None,
+        }
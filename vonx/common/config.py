@@ -19,14 +19,22 @@
 Methods for loading and working with our standard YAML-based configuration files
 """
 
+import hashlib
 import logging
 import os
 import re
 from typing import Callable, Mapping, TextIO
 
-import pkg_resources
 import yaml
 
+# use the libyaml bindings when they are available
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+VARIABLE_PATTERN = re.compile(r'\$(?:(\w+)|\{([^}]*?)(:-([^}]*))?\})')
+
+# parsed YAML trees indexed by resource path
+_PARSED_CACHE = {}
+
 
 def load_resource(path: str) -> TextIO:
     """
@@ -40,9 +48,43 @@ def load_resource(path: str) -> TextIO:
     components = path.rsplit(':', 1)
     if len(components) == 1:
         return open(components[0])
+    # pkg_resources is slow to import and only needed for package resources
+    import pkg_resources
     return pkg_resources.resource_stream(components[0], components[1])
 
 
+def load_yaml(path: str):
+    """
+    Load and parse a YAML resource file. The parsed tree is cached and reused while
+    the file modification time or content hash is unchanged, so it must not be
+    modified by the caller
+
+    Args:
+        path (str): The resource path in the form of `dir/file` or `package:dir/file`
+    Returns:
+        The parsed YAML tree
+    """
+    components = path.rsplit(':', 1)
+    cached = _PARSED_CACHE.get(path)
+    mtime = None
+    if len(components) == 1:
+        stat = os.stat(components[0])
+        mtime = (stat.st_mtime_ns, stat.st_size)
+        if cached and cached[0] == mtime:
+            return cached[2]
+    with load_resource(path) as resource:
+        data = resource.read()
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    digest = hashlib.sha1(data).hexdigest()
+    if cached and cached[1] == digest:
+        tree = cached[2]
+    else:
+        tree = yaml.load(data, Loader=YAML_LOADER)
+    _PARSED_CACHE[path] = (mtime, digest, tree)
+    return tree
+
+
 def load_settings(env=True) -> dict:
     """
     Loads the application settings from several sources:
@@ -67,28 +109,26 @@ def load_settings(env=True) -> dict:
     settings = {}
 
     # Load default settings
-    with load_resource('vonx.config:settings.yml') as resource:
-        cfg = yaml.load(resource)
-        if 'default' not in cfg:
-            raise ValueError('Default settings not found in settings.yml')
-        settings.update(cfg['default'])
-        if env_name != 'default' and env_name in cfg:
-            settings.update(cfg[env_name])
+    cfg = load_yaml('vonx.config:settings.yml')
+    if 'default' not in cfg:
+        raise ValueError('Default settings not found in settings.yml')
+    settings.update(cfg['default'])
+    if env_name != 'default' and env_name in cfg:
+        settings.update(cfg[env_name])
 
     # Load application settings
     ext_path = os.environ.get('SETTINGS_PATH')
     if not ext_path:
         config_root = os.environ.get('CONFIG_ROOT', os.curdir)
         ext_path = os.path.join(config_root, 'settings.yml')
-    with load_resource(ext_path) as resource:
-        ext_cfg = yaml.load(resource)
-        if 'default' in ext_cfg:
-            settings.update(ext_cfg['default'])
-        if env_name != 'default':
-            if env_name not in ext_cfg:
-                raise ValueError(
-                    'Environment not defined by application settings: {}'.format(env_name))
-            settings.update(ext_cfg[env_name])
+    ext_cfg = load_yaml(ext_path)
+    if 'default' in ext_cfg:
+        settings.update(ext_cfg['default'])
+    if env_name != 'default':
+        if env_name not in ext_cfg:
+            raise ValueError(
+                'Environment not defined by application settings: {}'.format(env_name))
+        settings.update(ext_cfg[env_name])
 
     # Inherit environment variables
     for k, v in env.items():
@@ -114,10 +154,10 @@ def load_config(path: str, env=None):
         file is not found
     """
     try:
-        with load_resource(path) as resource:
-            cfg = yaml.load(resource)
+        cfg = load_yaml(path)
     except FileNotFoundError:
         return False
+    # the cached tree is copied by the expansion
     cfg = expand_tree_variables(cfg, env or os.environ)
     return cfg
 
@@ -133,7 +173,7 @@ def expand_string_variables(value, env: Mapping, warn: bool = True):
     Returns:
         The transformed string
     """
-    if not isinstance(value, str):
+    if not isinstance(value, str) or '$' not in value:
         return value
     def _replace_var(matched):
         default = None
@@ -148,7 +188,7 @@ def expand_string_variables(value, env: Mapping, warn: bool = True):
             logging.getLogger(__name__).warning('Configuration variable not defined: %s', var)
             found = ''
         return found
-    return re.sub(r'\$(?:(\w+)|\{([^}]*?)(:-([^}]*))?\})', _replace_var, value)
+    return VARIABLE_PATTERN.sub(_replace_var, value)
 
 
 def map_tree(tree, map_fn: Callable):
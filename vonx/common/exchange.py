@@ -32,7 +32,6 @@ import time
 import traceback
 from typing import Awaitable, Callable, NamedTuple, Sequence
 
-import aiohttp
 
 from . import eventloop
 
@@ -702,11 +701,25 @@ class MessageProcessor:
         pass
 
 
-class LoggingTCPConnector(aiohttp.TCPConnector):
-    def _release(self, key, protocol, *, should_close=False):
-        close = should_close or self._force_close or protocol.should_close
-        LOGGER.debug("Connection released: %s", close and "Closing" or "Leaving open")
-        super(LoggingTCPConnector, self)._release(key, protocol, should_close=should_close)
+_CONNECTOR_CLASS = None
+
+def _logging_tcp_connector(**kwargs) -> 'aiohttp.TCPConnector':
+    """
+    Create a TCPConnector which logs connection reuse. The class is defined on
+    first use so that aiohttp is only imported by processes making HTTP requests
+    """
+    global _CONNECTOR_CLASS
+    if not _CONNECTOR_CLASS:
+        import aiohttp
+
+        class LoggingTCPConnector(aiohttp.TCPConnector):
+            def _release(self, key, protocol, *, should_close=False):
+                close = should_close or self._force_close or protocol.should_close
+                LOGGER.debug("Connection released: %s", close and "Closing" or "Leaving open")
+                super(LoggingTCPConnector, self)._release(
+                    key, protocol, should_close=should_close)
+        _CONNECTOR_CLASS = LoggingTCPConnector
+    return _CONNECTOR_CLASS(**kwargs)
 
 
 class RequestExecutor(MessageProcessor):
@@ -940,7 +953,7 @@ class RequestExecutor(MessageProcessor):
         return True
 
     @property
-    def tcp_connector(self) -> aiohttp.TCPConnector:
+    def tcp_connector(self) -> 'aiohttp.TCPConnector':
         """
         Return a connection pool associated with this event loop, which allows HTTP
         connection reuse
@@ -948,13 +961,14 @@ class RequestExecutor(MessageProcessor):
         if not self._connector:
             force_close = os.getenv('HTTP_FORCE_CLOSE_CONNECTIONS')
             force_close = bool(force_close) and force_close != 'false'
-            self._connector = LoggingTCPConnector(force_close=force_close)
+            self._connector = _logging_tcp_connector(force_close=force_close)
         return self._connector
 
-    def http_client(self, *args, **kwargs) -> aiohttp.ClientSession:
+    def http_client(self, *args, **kwargs) -> 'aiohttp.ClientSession':
         """
         Construct an HTTP client using the shared connection pool
         """
+        import aiohttp
         no_reuse = os.getenv('HTTP_NO_CONNECTOR_REUSE')
         no_reuse = bool(no_reuse) and no_reuse != 'false'
         if 'connector' not in kwargs and not no_reuse:
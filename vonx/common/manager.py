@@ -22,13 +22,20 @@ a collection of :class:`ServiceBase` instances
 
 
 import logging
+import multiprocessing as mp
 import os
+import signal
+import threading
 from typing import Mapping
 
 from . import config
 from . import exchange as exch
+from .util import process_memory
 from .service import (
+    ReloadConfigReq,
+    ServiceAck,
     ServiceBase,
+    ServiceRequest,
     ServiceStatus,
     ServiceStatusReq,
     ServiceResponse)
@@ -49,6 +56,7 @@ class ServiceManager(ServiceBase):
         self._executor_cls = exch.RequestExecutor
         self._proc_locals = {"pid": os.getpid()}
         self._services = {}
+        self._worker_pids = set()
         self._init_services()
 
     def _init_services(self) -> None:
@@ -67,6 +75,25 @@ class ServiceManager(ServiceBase):
         """
         self._services[svc_id] = service
 
+    def add_worker(self, pid: int) -> None:
+        """
+        Register a web server worker process, to be included in the status report
+
+        Args:
+            pid: the process identifier of the worker
+        """
+        # replaced rather than modified, as the status is reported from another thread
+        self._worker_pids = self._worker_pids | {pid}
+
+    def remove_worker(self, pid: int) -> None:
+        """
+        Remove a web server worker process after it has exited
+
+        Args:
+            pid: the process identifier of the worker
+        """
+        self._worker_pids = self._worker_pids - {pid}
+
     async def get_service_status(self, svc_id: str) -> dict:
         """
         Fetch the status of a registered service
@@ -119,6 +146,10 @@ class ServiceManager(ServiceBase):
         status["services"] = {}
         for svc_id in self._services:
             status["services"][svc_id] = await self.get_service_status(svc_id)
+        status["memory"] = process_memory()
+        if self._worker_pids:
+            status["workers"] = {
+                str(pid): process_memory(pid) for pid in sorted(self._worker_pids)}
         return ServiceStatus(status)
 
     @property
@@ -217,8 +248,18 @@ class ConfigServiceManager(ServiceManager):
 
     def __init__(self, env: Mapping = None, pid: str = "manager"):
         super(ConfigServiceManager, self).__init__(env, pid)
+        # shared with forked web workers, which compare it to detect a reload
+        self._config_generation = mp.RawValue("i", 0)
         self._services_cfg = None
 
+    @property
+    def config_generation(self) -> int:
+        """
+        Accessor for the number of successful configuration reloads, shared with
+        processes forked from this one
+        """
+        return self._config_generation.value
+
     @property
     def config_root(self) -> str:
         """
@@ -226,6 +267,21 @@ class ConfigServiceManager(ServiceManager):
         """
         return self._env.get("CONFIG_ROOT") or os.curdir
 
+    def config_path(self, settings_key, default_path) -> str:
+        """
+        Resolve the path to a configuration file
+
+        Args:
+            settings_key: the name of an environment variable defining an alternative
+                configuration path
+            default_path: the default path to the configuration file, relative
+                to the configuration root
+        """
+        path = self._env.get(settings_key)
+        if not path:
+            path = os.path.join(self.config_root, default_path)
+        return path
+
     def load_config_path(self, settings_key, default_path, env=None) -> dict:
         """
         Load a YAML configuration file with defined variables replaced in the result
@@ -238,9 +294,7 @@ class ConfigServiceManager(ServiceManager):
         Returns:
             the parsed YAML configuration with variables replaced
         """
-        path = self._env.get(settings_key)
-        if not path:
-            path = os.path.join(self.config_root, default_path)
+        path = self.config_path(settings_key, default_path)
         return config.load_config(path, env or self._env)
 
     def services_config(self, section: str) -> dict:
@@ -255,3 +309,59 @@ class ConfigServiceManager(ServiceManager):
         if self._services_cfg:
             return self._services_cfg.get(section) or {}
         return {}
+
+    def start(self, wait: bool = True) -> None:
+        """
+        Start the message processor and any other services, and install the
+        configuration reload signal handler if one is defined
+        """
+        super(ConfigServiceManager, self).start(wait)
+        self._install_reload_signal()
+
+    def _install_reload_signal(self) -> None:
+        """
+        Reload the configuration when the signal named by CONFIG_RELOAD_SIGNAL
+        (such as SIGHUP) is received by this process
+        """
+        sig_name = self._env.get("CONFIG_RELOAD_SIGNAL")
+        if not sig_name:
+            return
+        sig = getattr(signal, sig_name.upper(), None)
+        if not sig_name.upper().startswith("SIG") or not isinstance(sig, int):
+            raise ValueError("Unknown signal for CONFIG_RELOAD_SIGNAL: {}".format(sig_name))
+        if threading.current_thread() is not threading.main_thread():
+            LOGGER.warning("Configuration reload signal can only be installed from the main thread")
+            return
+        pid = os.getpid()
+        def handler(_signum, _frame):
+            # forked worker processes inherit the handler but not the service threads
+            if os.getpid() == pid:
+                LOGGER.info("Received %s, reloading configuration", sig_name.upper())
+                self.run_task(self._apply_reload())
+        signal.signal(sig, handler)
+
+    async def _service_request(self, request: ServiceRequest) -> ServiceResponse:
+        """
+        Handle a request from another service
+        """
+        if isinstance(request, ReloadConfigReq):
+            return await self._apply_reload()
+        return await super(ConfigServiceManager, self)._service_request(request)
+
+    async def _apply_reload(self) -> ServiceResponse:
+        """
+        Reload the configuration, advancing the configuration generation if successful
+        """
+        result = await self._reload_config()
+        if isinstance(result, ServiceAck):
+            self._config_generation.value += 1
+        return result
+
+    async def _reload_config(self) -> ServiceResponse:
+        """
+        Discard the cached configuration so that it is loaded again. Subclasses
+        extend this to apply the changes to their services
+        """
+        LOGGER.info("Reloading configuration")
+        self._services_cfg = None
+        return ServiceAck()
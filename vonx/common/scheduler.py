@@ -0,0 +1,195 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Concurrency limits and fair queueing for requests handled by a service
+"""
+
+import asyncio
+from collections import deque, OrderedDict
+import time
+from typing import Awaitable, Callable, Mapping
+
+
+def parse_limits(value: str) -> dict:
+    """
+    Parse a list of concurrency limits in the form `RequestType=n,OtherType=m`
+
+    Args:
+        value: the setting to be parsed
+    """
+    limits = {}
+    if value:
+        for part in str(value).split(","):
+            part = part.strip()
+            if not part:
+                continue
+            name, sep, limit = part.partition("=")
+            if not sep:
+                raise ValueError("Invalid concurrency limit: {}".format(part))
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+class _QueueStats:
+    """
+    Queue statistics for a single client key
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.count = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def results(self) -> dict:
+        return {
+            "depth": self.depth,
+            "count": self.count,
+            "avg_wait": self.total_wait / self.count if self.count else None,
+            "max_wait": self.max_wait,
+        }
+
+
+class _RequestPool:
+    """
+    The active and waiting requests of a single request type
+    """
+
+    def __init__(self, limit: int):
+        self.active = 0
+        self.limit = limit
+        self.queues = OrderedDict()
+
+
+class RequestScheduler:
+    """
+    Limits the number of requests of each type which may be processed at once.
+    Requests beyond the limit wait in a queue for each client key (normally the
+    connection), and the queues are served in turn so that a single busy client
+    cannot delay requests from the others indefinitely. Request types without a
+    configured limit are processed immediately.
+    """
+
+    def __init__(self, limits: Mapping[str, int] = None):
+        """
+        Args:
+            limits: the maximum number of concurrent requests for each request type
+        """
+        self._pools = {}
+        self._stats = {}
+        for kind, limit in (limits or {}).items():
+            if limit and limit > 0:
+                self._pools[kind] = _RequestPool(limit)
+
+    @property
+    def limits(self) -> dict:
+        """
+        Accessor for the configured concurrency limits
+        """
+        return {kind: pool.limit for kind, pool in self._pools.items()}
+
+    async def run(self, kind: str, client_key: str, proc: Callable[[], Awaitable]):
+        """
+        Wait for an available slot and run a request
+
+        Args:
+            kind: the request type
+            client_key: the identifier of the client, used to select the queue
+            proc: a function returning the awaitable to run
+        """
+        pool = self._pools.get(kind)
+        if not pool:
+            return await proc()
+        client_key = client_key or ""
+        stats = self._stats.get(client_key)
+        if not stats:
+            stats = self._stats[client_key] = _QueueStats()
+        start = time.perf_counter()
+        if pool.active < pool.limit and not pool.queues:
+            pool.active += 1
+        else:
+            waiter = asyncio.get_event_loop().create_future()
+            queue = pool.queues.get(client_key)
+            if queue is None:
+                queue = pool.queues[client_key] = deque()
+            queue.append(waiter)
+            stats.depth += 1
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    self._release(pool)
+                else:
+                    self._remove_waiter(pool, client_key, waiter)
+                    stats.depth -= 1
+                raise
+            stats.depth -= 1
+        wait = time.perf_counter() - start
+        stats.count += 1
+        stats.total_wait += wait
+        stats.max_wait = max(stats.max_wait, wait)
+        try:
+            return await proc()
+        finally:
+            self._release(pool)
+
+    def _remove_waiter(self, pool: _RequestPool, client_key: str, waiter) -> None:
+        """
+        Remove a cancelled request from its queue
+        """
+        queue = pool.queues.get(client_key)
+        if queue is not None:
+            try:
+                queue.remove(waiter)
+            except ValueError:
+                pass
+            if not queue:
+                del pool.queues[client_key]
+
+    def _release(self, pool: _RequestPool) -> None:
+        """
+        Hand a finished request's slot to the next client queue in turn
+        """
+        pool.active -= 1
+        while pool.queues and pool.active < pool.limit:
+            client_key, queue = next(iter(pool.queues.items()))
+            waiter = queue.popleft()
+            if queue:
+                pool.queues.move_to_end(client_key)
+            else:
+                del pool.queues[client_key]
+            if not waiter.done():
+                pool.active += 1
+                waiter.set_result(True)
+
+    @property
+    def stats(self) -> dict:
+        """
+        Get the number of active and queued requests for each request type, and the
+        queue statistics for each client key
+        """
+        return {
+            "types": {
+                kind: {
+                    "active": pool.active,
+                    "limit": pool.limit,
+                    "queued": sum(len(queue) for queue in pool.queues.values()),
+                } for kind, pool in self._pools.items()
+            },
+            "queues": {key: stats.results() for key, stats in self._stats.items()},
+        }
@@ -29,6 +29,7 @@ from .exchange import (
     ExchangeMessage,
     MessageWrapper,
     RequestExecutor)
+from .scheduler import RequestScheduler, parse_limits
 from .util import Stats
 
 LOGGER = logging.getLogger(__name__)
@@ -80,12 +81,21 @@ class ServiceStopReq(ServiceRequest):
 
 class ServiceSyncReq(ServiceRequest):
     """
-    Request a service to perform a sync
+    Request a service to perform a sync. By default only changed or unsynced
+    items are processed, unless a full sync is requested
     """
     _fields = (
         ("wait", bool),
+        ("full", bool, False),
     )
 
+class ReloadConfigReq(ServiceRequest):
+    """
+    Request a service manager to reload its configuration files and apply any
+    changes to the running services
+    """
+    pass
+
 class ServiceSyncError(Exception):
     """
     An exception raised in response to a controlled failure during synchronization
@@ -98,9 +108,15 @@ class ServiceBase(RequestExecutor):
     The base class for services handled by the :class:`ServiceManager` instance
     """
 
+    # default concurrency limits by request type, overridden by REQUEST_CONCURRENCY
+    _request_limits = {}
+
     def __init__(self, pid: str, exchange: Exchange, env: Mapping):
         super(ServiceBase, self).__init__(pid, exchange)
         self._env = env
+        limits = dict(self._request_limits)
+        limits.update(parse_limits(env.get("REQUEST_CONCURRENCY")))
+        self._scheduler = RequestScheduler(limits)
         self._status = {
             "id": self._pid,
             "failed": False,
@@ -108,8 +124,10 @@ class ServiceBase(RequestExecutor):
             "syncing": False,
             "started": False,
         }
+        self._caches = {}
         self._stats = Stats()
         self._sync_again = False
+        self._sync_full = False
         self._sync_lock = None
 
     def start(self, wait: bool = True) -> None:
@@ -156,9 +174,12 @@ class ServiceBase(RequestExecutor):
         """
         pass
 
-    async def _sync(self) -> None:
+    async def _sync(self, full: bool = False) -> None:
         """
         Service sync process
+
+        Args:
+            full: whether to re-check every item instead of only the changed ones
         """
         #pylint: disable=broad-except
         async with self._sync_lock:
@@ -172,9 +193,12 @@ class ServiceBase(RequestExecutor):
             synced = False
             while again:
                 self._sync_again = again = False
+                full = full or self._sync_full
+                self._sync_full = False
                 self._update_status(syncing=True)
                 try:
-                    synced = await self._service_sync()
+                    synced = await self._service_sync(full)
+                    full = False
                     if self._sync_again:
                         synced = False
                         again = True
@@ -189,14 +213,19 @@ class ServiceBase(RequestExecutor):
             if synced and not prev:
                 LOGGER.info("Completed sync: %s", self.pid)
 
-    def _sync_required(self) -> None:
+    def _sync_required(self, full: bool = False) -> None:
         self._sync_again = True
+        if full:
+            self._sync_full = True
         self._update_status(synced=False)
 
-    async def _service_sync(self) -> bool:
+    async def _service_sync(self, full: bool = False) -> bool:
         """
         Perform service-specific sync actions. This may be called multiple times,
         and should not repeat sync actions that aren't necessary
+
+        Args:
+            full: whether to re-check items which have already been synced
         """
         return True
 
@@ -206,6 +235,11 @@ class ServiceBase(RequestExecutor):
         """
         result = self._status.copy()
         result["stats"] = self._stats.results()
+        if self._caches:
+            result["stats"]["caches"] = {
+                name: cache.stats for name, cache in self._caches.items()}
+        if self._scheduler.limits:
+            result["stats"]["scheduler"] = self._scheduler.stats
         return ServiceStatus(result)
 
     async def _handle_message(self, received: MessageWrapper) -> bool:
@@ -238,13 +272,13 @@ class ServiceBase(RequestExecutor):
                     if self._status["failed"]:
                         reply = ServiceFail("Service could not be synced: {}".format(self.pid))
                         break
-                    await self._sync()
+                    await self._sync(request.full)
                     if self._status["synced"]:
                         reply = ServiceAck()
                         break
                     await asyncio.sleep(2)
             else:
-                self.run_task(self._sync())
+                self.run_task(self._sync(request.full))
                 reply = ServiceAck()
 
         elif isinstance(request, ServiceStatusReq):
@@ -252,7 +286,10 @@ class ServiceBase(RequestExecutor):
 
         elif isinstance(request, ServiceRequest):
             try:
-                reply = await self._service_request(request)
+                reply = await self._scheduler.run(
+                    request.__class__.__name__,
+                    self._request_queue_key(request),
+                    lambda: self._service_request(request))
             except Exception:
                 LOGGER.exception("Exception while handling request:")
                 reply = ServiceFail("Exception while handling request")
@@ -272,6 +309,12 @@ class ServiceBase(RequestExecutor):
         self.send_noreply(from_pid, reply, ident)
         return True
 
+    def _request_queue_key(self, request: ServiceRequest) -> str:
+        """
+        Determine the queue used for a request when its request type is limited
+        """
+        return request.get("connection_id")
+
     async def _service_request(self, request: ServiceRequest) -> ServiceResponse:
         """
         Handle a request from another service
@@ -284,6 +327,12 @@ class ServiceBase(RequestExecutor):
         """
         pass
 
+    def _add_cache(self, name: str, cache) -> None:
+        """
+        Register a cache so that its statistics are included in the service status
+        """
+        self._caches[name] = cache
+
     def _timer(self, *tasks, log_as=None):
         """
         Start a new timer for a set of tasks
@@ -21,6 +21,7 @@ Utility functions and classes
 
 import json
 import logging
+import os
 import time
 
 from .exchange import ExchangeMessage
@@ -77,6 +78,39 @@ def normalize_credential_ids(cred_ids) -> set:
 
 
 
+def process_memory(pid: int = None) -> dict:
+    """
+    Get the memory usage of a process from /proc (Linux only)
+
+    Args:
+        pid: the process identifier, defaulting to the current process
+    Returns:
+        a dict with the resident set size (rss), the proportional set size (pss)
+        which divides shared pages between processes, and the unique set size (uss)
+        of pages private to the process, in bytes. The dict is empty if the
+        information is not available
+    """
+    pid = pid or os.getpid()
+    fields = {}
+    for name in ("smaps_rollup", "smaps"):
+        try:
+            with open("/proc/{}/{}".format(pid, name)) as smaps:
+                for line in smaps:
+                    parts = line.split()
+                    if len(parts) == 3 and parts[2] == "kB":
+                        fields[parts[0]] = fields.get(parts[0], 0) + int(parts[1]) * 1024
+            break
+        except OSError:
+            continue
+    if "Rss:" not in fields:
+        return {}
+    return {
+        "rss": fields["Rss:"],
+        "pss": fields.get("Pss:"),
+        "uss": fields.get("Private_Clean:", 0) + fields.get("Private_Dirty:", 0),
+    }
+
+
 class Stats:
     """
     Measure combined statistics for various named tasks
@@ -0,0 +1,274 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+A persistent cache of immutable ledger artifacts (schemas and credential definitions),
+which may be shared by multiple processes and retained between restarts
+"""
+
+import hashlib
+import json
+import logging
+import pathlib
+import sqlite3
+import threading
+
+from von_anchor.cache import CRED_DEF_CACHE, SCHEMA_CACHE
+from von_anchor.util import schema_key
+
+LOGGER = logging.getLogger(__name__)
+
+SCHEMA = "schema"
+CRED_DEF = "cred_def"
+
+
+def is_cached(kind: str, artifact_id: str) -> bool:
+    """
+    Check whether an artifact is present in the in-memory von_anchor cache
+
+    Args:
+        kind: the artifact type, either `schema` or `cred_def`
+        artifact_id: the ledger identifier of the artifact
+    """
+    if kind == SCHEMA:
+        return SCHEMA_CACHE.contains(schema_key(artifact_id))
+    return artifact_id in CRED_DEF_CACHE
+
+
+def cache_artifact(kind: str, data: dict) -> None:
+    """
+    Add an artifact to the in-memory von_anchor cache
+
+    Args:
+        kind: the artifact type, either `schema` or `cred_def`
+        data: the artifact retrieved from the ledger
+    """
+    if kind == SCHEMA:
+        SCHEMA_CACHE[schema_key(data["id"])] = data
+    else:
+        CRED_DEF_CACHE[data["id"]] = data
+
+
+def ledger_id_from_genesis(genesis_path: str) -> str:
+    """
+    Derive an identifier for a ledger from its first genesis transaction, so that
+    artifacts from different ledgers are never confused. The remaining transactions
+    are not included, as the node list changes when the genesis file is refreshed
+
+    Args:
+        genesis_path: the path to the genesis transaction file
+    """
+    with open(genesis_path, "rb") as genesis_file:
+        content = genesis_file.read()
+    for line in content.decode("utf-8", "replace").splitlines():
+        try:
+            txn = json.loads(line)
+        except ValueError:
+            continue
+        if not isinstance(txn, dict):
+            continue
+        # the transaction ID is found in the metadata of newer transaction formats
+        txn_id = (txn.get("txnMetadata") or {}).get("txnId") or txn.get("txnId")
+        ident = txn_id or json.dumps(txn, sort_keys=True)
+        return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+    return hashlib.sha256(content).hexdigest()
+
+
+class LedgerArtifactCache:
+    """
+    Stores ledger artifacts in an SQLite database. Artifacts are never replaced once
+    written, so concurrent writers may safely add the same artifact. The database
+    methods may be called from worker threads, one at a time
+    """
+
+    def __init__(self, root_path: str, ledger_id: str, timeout: float = 5.0):
+        """
+        Args:
+            root_path: the directory containing the cache database
+            ledger_id: the identifier of the ledger being cached
+            timeout: the number of seconds to wait for a lock held by another process
+        """
+        root = pathlib.Path(root_path)
+        if not root.exists():
+            root.mkdir(parents=True)
+        self._ledger_id = ledger_id
+        self._lock = threading.Lock()
+        self._path = root.joinpath("ledger_artifacts.db")
+        self._stored = set()
+        self._db = sqlite3.connect(str(self._path), timeout=timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            "ledger_id TEXT NOT NULL, kind TEXT NOT NULL, artifact_id TEXT NOT NULL, "
+            "data TEXT NOT NULL, PRIMARY KEY (ledger_id, kind, artifact_id))")
+        self._db.commit()
+
+    @property
+    def path(self) -> pathlib.Path:
+        """
+        Accessor for the path to the cache database
+        """
+        return self._path
+
+    def get(self, kind: str, artifact_id: str) -> dict:
+        """
+        Fetch a single artifact
+
+        Args:
+            kind: the artifact type, either `schema` or `cred_def`
+            artifact_id: the ledger identifier of the artifact
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM artifacts WHERE ledger_id=? AND kind=? AND artifact_id=?",
+                (self._ledger_id, kind, artifact_id)).fetchone()
+        if row:
+            self._stored.add((kind, artifact_id))
+            return json.loads(row[0])
+        return None
+
+    def load(self, kind: str) -> list:
+        """
+        Fetch all stored artifacts of a given type
+
+        Args:
+            kind: the artifact type, either `schema` or `cred_def`
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT artifact_id, data FROM artifacts WHERE ledger_id=? AND kind=?",
+                (self._ledger_id, kind)).fetchall()
+        for row in rows:
+            self._stored.add((kind, row[0]))
+        return [json.loads(row[1]) for row in rows]
+
+    def put(self, kind: str, artifact_id: str, data: dict) -> None:
+        """
+        Store an artifact unless it has already been stored
+
+        Args:
+            kind: the artifact type, either `schema` or `cred_def`
+            artifact_id: the ledger identifier of the artifact
+            data: the artifact retrieved from the ledger
+        """
+        if not artifact_id or not data or (kind, artifact_id) in self._stored:
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO artifacts (ledger_id, kind, artifact_id, data) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self._ledger_id, kind, artifact_id, json.dumps(data)))
+                self._db.commit()
+            self._stored.add((kind, artifact_id))
+        except sqlite3.Error:
+            LOGGER.exception("Error storing ledger artifact: %s", artifact_id)
+
+    def preload(self) -> int:
+        """
+        Populate the in-memory von_anchor schema and credential definition caches
+        from the stored artifacts
+
+        Returns:
+            the number of artifacts loaded
+        """
+        count = 0
+        for kind in (SCHEMA, CRED_DEF):
+            for artifact in self.load(kind):
+                cache_artifact(kind, artifact)
+                count += 1
+        return count
+
+    def is_stored(self, kind: str, artifact_id: str) -> bool:
+        """
+        Check whether an artifact is known to have been stored
+
+        Args:
+            kind: the artifact type, either `schema` or `cred_def`
+            artifact_id: the ledger identifier of the artifact
+        """
+        return (kind, artifact_id) in self._stored
+
+    def proof_artifacts(self, proof: dict) -> list:
+        """
+        Find the schemas and credential definitions referenced by a verified proof
+        which have been cached by von_anchor, but not yet stored
+
+        Args:
+            proof: the verified proof
+        Returns:
+            a list of tuples of the artifact type, identifier and data
+        """
+        found = []
+        for ident in proof.get("identifiers") or []:
+            s_id = ident.get("schema_id")
+            if s_id and not self.is_stored(SCHEMA, s_id) and is_cached(SCHEMA, s_id):
+                found.append((SCHEMA, s_id, SCHEMA_CACHE[schema_key(s_id)]))
+            cd_id = ident.get("cred_def_id")
+            if cd_id and not self.is_stored(CRED_DEF, cd_id) and is_cached(CRED_DEF, cd_id):
+                found.append((CRED_DEF, cd_id, CRED_DEF_CACHE[cd_id]))
+        return found
+
+    def store_proof_artifacts(self, proof: dict) -> None:
+        """
+        Store the schemas and credential definitions referenced by a verified proof,
+        once they have been cached by von_anchor
+
+        Args:
+            proof: the verified proof
+        """
+        for kind, artifact_id, data in self.proof_artifacts(proof):
+            self.put(kind, artifact_id, data)
+
+    def restore(self, kind: str, artifact_id: str) -> bool:
+        """
+        Add a stored artifact to the in-memory von_anchor cache if it is not present,
+        including artifacts stored by other processes since the cache was preloaded
+
+        Args:
+            kind: the artifact type, either `schema` or `cred_def`
+            artifact_id: the ledger identifier of the artifact
+        Returns:
+            True if the artifact is now cached
+        """
+        if not artifact_id:
+            return False
+        if is_cached(kind, artifact_id):
+            return True
+        data = self.get(kind, artifact_id)
+        if data:
+            cache_artifact(kind, data)
+            return True
+        return False
+
+    def restore_proof_artifacts(self, proof: dict) -> None:
+        """
+        Add the stored schemas and credential definitions referenced by a proof
+        to the in-memory von_anchor cache before it is verified
+
+        Args:
+            proof: the proof to be verified
+        """
+        for ident in proof.get("identifiers") or []:
+            self.restore(SCHEMA, ident.get("schema_id"))
+            self.restore(CRED_DEF, ident.get("cred_def_id"))
+
+    def close(self) -> None:
+        """
+        Close the database connection
+        """
+        self._db.close()
@@ -34,7 +34,7 @@ from ..common.service import (
 )
 
 from .config import AgentType, ConnectionType
-from .errors import IndyClientError
+from .errors import IndyClientError, IndyIdempotencyConflict
 from . import messages
 
 LOGGER = logging.getLogger(__name__)
@@ -57,7 +57,9 @@ class IndyClient:
         """
         result = await self._target.request(request)
 
-        if isinstance(result, (messages.IndyServiceFail, ServiceFail)):
+        if isinstance(result, messages.IdempotencyConflict):
+            raise IndyIdempotencyConflict(result.value)
+        elif isinstance(result, (messages.IndyServiceFail, ServiceFail)):
             raise IndyClientError(result.value)
         elif expect and not isinstance(result, expect):
             raise IndyClientError("Unexpected result: {}".format(result))
@@ -174,6 +176,21 @@ class IndyClient:
                 origin_did, attr_names, config, dependencies or []),
             messages.IndyServiceAck)
 
+    async def register_config(self, requests: Sequence[messages.IndyServiceReq]) -> list:
+        """
+        Register a set of wallets, agents, credential types, connections and proof specs
+        in a single request. Either all of the registrations are applied or none
+
+        Args:
+            requests: a list of registration request messages, in the order to be applied
+        Returns:
+            the status responses to the individual requests
+        """
+        result = await self._fetch(
+            messages.RegisterConfigReq(requests),
+            messages.RegisterConfig)
+        return result.results
+
     async def register_http_connection(self, agent_id: str, config: dict = None) -> str:
         """
         Register an HTTP connection to a holder/prover service
@@ -226,7 +243,8 @@ class IndyClient:
         return result.status
 
     async def issue_credential(self, connection_id: str, schema_name: str, schema_version: str,
-                               origin_did: str, cred_data: dict) -> messages.StoredCredential:
+                               origin_did: str, cred_data: dict,
+                               idempotency_key: str = None) -> messages.StoredCredential:
         """
         Issue a credential to a previously-registered connection
 
@@ -236,15 +254,18 @@ class IndyClient:
             schema_version: the version of the schema
             origin_did: the origin DID of the schema, if external
             cred_data: the new credential's raw claim attribute values
+            idempotency_key: an optional key used to detect repeated requests
         """
         return await self._fetch(
             messages.IssueCredentialReq(
-                connection_id, schema_name, schema_version, origin_did, cred_data),
+                connection_id, schema_name, schema_version, origin_did, cred_data,
+                idempotency_key),
             messages.StoredCredential)
 
     async def issue_credential_batch(
             self, connection_id: str, schema_name: str, schema_version: str,
-            origin_did: str, cred_data: Sequence[dict]) -> messages.StoredCredentialBatch:
+            origin_did: str, cred_data: Sequence[dict],
+            idempotency_key: str = None) -> messages.StoredCredentialBatch:
         """
         Issue a list of credentials to a previously-registered connection
 
@@ -254,12 +275,47 @@ class IndyClient:
             schema_version: the version of the schema
             origin_did: the origin DID of the schema, if external
             cred_data: the list of new credential's raw claim attribute values
+            idempotency_key: an optional key used to detect repeated requests
         """
         return await self._fetch(
             messages.IssueCredentialBatchReq(
-                connection_id, schema_name, schema_version, origin_did, cred_data),
+                connection_id, schema_name, schema_version, origin_did, cred_data,
+                idempotency_key),
             messages.StoredCredentialBatch)
 
+    async def start_issue_credential_job(
+            self, connection_id: str, credentials: Sequence[dict],
+            idempotency_key: str = None) -> dict:
+        """
+        Begin issuing a list of credentials to a previously-registered connection,
+        returning before the credentials have been issued
+
+        Args:
+            connection_id: the registered connection identifier
+            credentials: a list of dicts containing the schema_name, schema_version,
+                origin_did and attributes of each credential
+            idempotency_key: an optional key used to detect repeated requests
+        Returns:
+            the status of the issuance job, which is the existing job when the
+            idempotency key has been used before
+        """
+        result = await self._fetch(
+            messages.IssueCredentialJobReq(connection_id, credentials, idempotency_key),
+            messages.IssueCredentialJobStatus)
+        return result.status
+
+    async def get_issue_credential_job(self, job_id: str) -> dict:
+        """
+        Fetch the progress and results of an issuance job
+
+        Args:
+            job_id: the identifier returned when the job was started
+        """
+        result = await self._fetch(
+            messages.IssueCredentialJobStatusReq(job_id),
+            messages.IssueCredentialJobStatus)
+        return result.status
+
     async def create_credential_request(self, holder_id: str, cred_offer: dict,
                                         cred_def_id: str) -> messages.CredentialRequest:
         """
@@ -303,6 +359,20 @@ class IndyClient:
             messages.ResolveSchemaReq(name, version, origin_did),
             messages.ResolvedSchema)
 
+    async def invalidate_schema_cache(self, name: str = None, version: str = None,
+                                      origin_did: str = None) -> None:
+        """
+        Discard a cached schema resolved from the ledger, so that it is looked up again
+
+        Args:
+            name: the schema name, or None to discard all cached schemas
+            version: the schema version
+            origin_did: the DID of the issuer which published the schema
+        """
+        await self._fetch(
+            messages.InvalidateSchemaCacheReq(name, version, origin_did),
+            messages.IndyServiceAck)
+
     async def get_org_credentials(self, connection_id: str, org_name: str) -> messages.OrganizationCredentials:
         """
         Gets credentials for a given organization
@@ -418,6 +488,21 @@ class IndyClient:
             messages.RequestProofReq(connection_id, proof_req, cred_ids, params),
             messages.VerifiedProof)
 
+    async def request_proof_batch(self, items: Sequence[dict]) -> list:
+        """
+        Request and verify a list of proofs from holder connections
+
+        Args:
+            items: a list of dicts defining the connection_id, spec_id, and optional
+                cred_ids and params for each proof
+        Returns:
+            a list of dicts containing the success flag and result for each proof
+        """
+        result = await self._fetch(
+            messages.RequestProofBatchReq(items),
+            messages.RequestProofBatch)
+        return result.results
+
     async def verify_proof(self, verifier_id: str, proof_req: messages.ProofRequest,
                            proof: messages.ConstructedProof) -> messages.VerifiedProof:
         """
@@ -444,15 +529,16 @@ class IndyClient:
             messages.ResolveNymReq(did, agent_id),
             messages.ResolvedNym)
 
-    async def sync(self, wait: bool = True) -> bool:
+    async def sync(self, wait: bool = True, full: bool = False) -> bool:
         """
         Request the :class:`IndyService` to perform synchronization of registered services
 
         Args:
             wait: whether to return immediately or wait for the sync to finish
+            full: whether to re-sync all services rather than only those which changed
         """
         result = await self._fetch(
-            ServiceSyncReq(wait))
+            ServiceSyncReq(wait, full))
         if isinstance(result, ServiceAck):
             return True
         return False
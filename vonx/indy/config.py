@@ -22,19 +22,12 @@ schemas, proof requests, and wallets.
 
 import base64
 import binascii
-from distutils.version import LooseVersion
 from enum import Enum
 import logging
 from typing import Mapping, Sequence
 
-from von_anchor import HolderProver, Verifier
-from von_anchor.anchor.base import _BaseAnchor
-from von_anchor.anchor.demo import BCRegistrarAnchor, OrgHubAnchor
-from von_anchor.nodepool import NodePool
-from von_anchor.wallet import Wallet, register_wallet_storage_library
-from von_anchor.util import schema_id
-
-from indy.error import IndyError, ErrorCode
+# von_anchor and the indy SDK are imported when agents and wallets are created,
+# so that clients of the IndyService can use these classes without loading them
 
 from .connection import ConnectionBase, ConnectionType, HolderConnection, HttpConnection
 from .errors import IndyConfigError
@@ -63,8 +56,13 @@ class AgentCfg:
             self.agent_type = AgentType(agent_type)
         except KeyError:
             raise IndyConfigError("Unsupported agent type: {}".format(agent_type))
+        self.closing = False
         self.cred_types = []
+        self._cred_type_index = {}
+        self._cred_type_names = {}
         self._instance = None
+        self.last_used = None
+        self.leases = 0
         self.opened = False
         self.registered = False
         self.synced = False
@@ -77,6 +75,7 @@ class AgentCfg:
         self.logo_b64 = params.get("logo_b64")
         self.logo_path = params.get("logo_path")
         self.link_secret_name = params.get("link_secret_name", "master-secret")
+        self.cache_proofs = params.get("cache_proofs", True)
 
     @property
     def created(self) -> bool:
@@ -103,7 +102,7 @@ class AgentCfg:
         return ret
 
     @property
-    def instance(self) -> _BaseAnchor:
+    def instance(self) -> '_BaseAnchor':
         """
         Accessor for the current agent instance
         """
@@ -136,15 +135,18 @@ class AgentCfg:
         """
         return self._instance and self._instance.verkey
 
-    async def create(self, wallet: 'WalletCfg', pool: NodePool) -> None:
+    async def create(self, wallet: 'WalletCfg', pool: 'NodePool', lazy: bool = False) -> None:
         """
         Create the agent instance
 
         Args:
             wallet: the registered wallet configuration, previously created and opened
             pool: the initialized :class:`NodePool` instance for the wallet
+            lazy: whether to leave the agent closed until it is first used
         """
         if not self._instance:
+            from von_anchor import HolderProver, Verifier
+            from von_anchor.anchor.demo import BCRegistrarAnchor, OrgHubAnchor
             cls = None
             params = {"cfg": self.extended_config}
             if self.agent_type == AgentType.issuer:
@@ -158,13 +160,15 @@ class AgentCfg:
             else:
                 raise IndyConfigError("Unknown agent type")
             self._instance = cls(wallet.instance, pool, **params)
-        await self.open()
+        if not lazy:
+            await self.open()
 
     async def open(self) -> None:
         """
         Open the agent instance for storing or issuing credentials
         """
         if not self.opened:
+            from von_anchor import HolderProver
             self.opened = await self._instance.open()
             if isinstance(self._instance, HolderProver):
                 await self._instance.create_link_secret(self.link_secret_name)
@@ -213,12 +217,38 @@ class AgentCfg:
         """
         if not self.is_issuer:
             raise IndyConfigError("Only issuer agent may publish schemas")
-        self.cred_types.append({
+        cred_type = {
             "definition": schema,
             "ledger_schema": None,
             "cred_def": None,
             "params": params,
-        })
+        }
+        self.cred_types.append(cred_type)
+        self._index_credential_type(cred_type)
+
+    def _index_credential_type(self, cred_type: dict) -> None:
+        """
+        Add a credential type to the lookup indexes
+        """
+        defn = cred_type["definition"]
+        self._cred_type_names.setdefault(defn.name, []).append(cred_type)
+        self._cred_type_index.setdefault((defn.name, defn.version, defn.origin_did), cred_type)
+
+    def reindex_credential_types(self) -> None:
+        """
+        Rebuild the credential type lookup indexes after the list has been modified
+        """
+        self._cred_type_index = {}
+        self._cred_type_names = {}
+        for cred_type in self.cred_types:
+            self._index_credential_type(cred_type)
+
+    @property
+    def credential_type_names(self) -> set:
+        """
+        Accessor for the names of the credential types issued by this agent
+        """
+        return set(self._cred_type_names)
 
     def find_credential_type(self, name: str, version: str, origin_did: str = None) -> dict:
         """
@@ -229,10 +259,17 @@ class AgentCfg:
             name: the schema name to be located
             version: the schema version to be located
         """
-        match = SchemaCfg(name, version, None, origin_did)
-        for cred_type in self.cred_types:
-            if cred_type["definition"].compare(match):
-                return cred_type
+        if version:
+            found = self._cred_type_index.get((name, version, origin_did))
+            if found:
+                return found
+        for cred_type in self._cred_type_names.get(name, ()):
+            defn = cred_type["definition"]
+            if version and defn.version and version != defn.version:
+                continue
+            if origin_did and defn.origin_did and origin_did != defn.origin_did:
+                continue
+            return cred_type
         return None
 
     def get_connection_params(self, _connection: 'ConnectionCfg') -> dict:
@@ -342,11 +379,14 @@ class ConnectionCfg:
             await self._instance.open(service)
             self.opened = True
 
-    async def sync(self) -> None:
+    async def sync(self, force: bool = False) -> None:
         """
         Perform synchronization of the connection instance
+
+        Args:
+            force: whether to repeat the synchronization if already performed
         """
-        if not self.synced:
+        if force or not self.synced:
             await self._instance.sync()
             self.synced = True
 
@@ -372,6 +412,8 @@ class ProofSpecCfg:
         if not self.schemas:
             raise IndyConfigError("Missing schemas for proof spec: {}".format(self.spec_id))
         self.synced = not self.get_incomplete_schemas()
+        # the compiled proof request, reset whenever the schemas are updated
+        self.template = None
 
     @property
     def status(self) -> dict:
@@ -397,6 +439,7 @@ class ProofSpecCfg:
         """
         Populate required schema details from the ledger
         """
+        self.template = None
         for schema in self.schemas:
             if not schema.get("definition"):
                 s_key = schema["key"]
@@ -433,6 +476,7 @@ class SchemaCfg:
         """
         Accessor for the schema_id of this schema
         """
+        from von_anchor.util import schema_id
         return schema_id(self.origin_did, self.name, self.version)
 
     @property
@@ -535,6 +579,8 @@ class SchemaManager:
 
     def __init__(self):
         self._schemas = []
+        self._index = {}
+        self._latest = {}
 
     @property
     def schemas(self) -> list:
@@ -565,6 +611,17 @@ class SchemaManager:
             else:
                 raise IndyConfigError('Duplicate schema definition: {}'.format(schema))
         self._schemas.append(schema)
+        self._index_schema(schema)
+
+    def _index_schema(self, schema: SchemaCfg) -> None:
+        """
+        Add a schema to the lookup indexes, updating the latest version for its name
+        """
+        from distutils.version import LooseVersion
+        self._index.setdefault((schema.name, schema.version), schema)
+        latest = self._latest.get(schema.name)
+        if latest is None or LooseVersion(latest.version) < LooseVersion(schema.version):
+            self._latest[schema.name] = schema
 
     def remove_schema(self, schema, version=None) -> None:
         """
@@ -577,6 +634,10 @@ class SchemaManager:
         if isinstance(schema, str):
             schema = self.find(schema, version)
         self._schemas.remove(schema)
+        self._index = {}
+        self._latest = {}
+        for remain in self._schemas:
+            self._index_schema(remain)
 
     def load(self, values: Sequence, override=False) -> None:
         """
@@ -600,17 +661,9 @@ class SchemaManager:
         Returns:
             the located :class:`SchemaCfg` instance, if any
         """
-        found = None
-        for schema in self._schemas:
-            if schema.name == name:
-                if version is not None:
-                    if schema.version == version:
-                        found = schema
-                        break
-                else:
-                    if found is None or LooseVersion(found.version) < LooseVersion(schema.version):
-                        found = schema
-        return found
+        if version is not None:
+            return self._index.get((name, version))
+        return self._latest.get(name)
 
 
 class WalletCfg:
@@ -655,7 +708,7 @@ class WalletCfg:
         return self._instance and self._instance.created
 
     @property
-    def instance(self) -> Wallet:
+    def instance(self) -> 'Wallet':
         """
         Accessor for the wallet instance
         """
@@ -681,6 +734,8 @@ class WalletCfg:
     async def load_storage_library(self, storage_type):
         # load storage library for postgres
         if storage_type == "postgres":
+            from indy.error import IndyError, ErrorCode
+            from von_anchor.wallet import register_wallet_storage_library
             try:
                 await register_wallet_storage_library(
                     storage_type,
@@ -698,6 +753,7 @@ class WalletCfg:
         """
         Create the wallet instance
         """
+        from von_anchor.wallet import Wallet
         await self.load_storage_library(self.type)
         self._instance = Wallet(
             self.seed,
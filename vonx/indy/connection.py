@@ -24,8 +24,6 @@ from enum import Enum
 import logging
 from typing import Sequence
 
-import aiohttp
-
 from ..common.exchange import RequestTarget
 from .errors import IndyConfigError, IndyConnectionError
 from .messages import (
@@ -59,20 +57,20 @@ class HttpSession:
     Handle an exception or bad response from an HTTP request
     """
 
-    def __init__(self, method: str, http_client: aiohttp.ClientSession = None, timeout=None):
+    def __init__(self, method: str, http_client: 'aiohttp.ClientSession' = None, timeout=None):
         self._client = http_client
         self._method = method
         self._opened = False
         self._timeout = timeout
 
     @property
-    def client(self) -> aiohttp.ClientSession:
+    def client(self) -> 'aiohttp.ClientSession':
         """
         Accessor for the :class:`ClientSession` instance
         """
         return self._client
 
-    async def check_status(self, response: aiohttp.ClientResponse, accept=(200, 201)):
+    async def check_status(self, response: 'aiohttp.ClientResponse', accept=(200, 201)):
         """
         Check the HTTP status of a response to a previous request
         """
@@ -87,6 +85,7 @@ class HttpSession:
 
     async def __aenter__(self) -> 'ErrorHandler':
         if not self._client:
+            import aiohttp
             self._client = aiohttp.ClientSession(read_timeout=self._timeout)
             self._opened = True
         return self
@@ -135,6 +134,13 @@ class ConnectionBase:
         """
         pass
 
+    def sync_spec(self) -> dict:
+        """
+        Get the registration submitted by :meth:`sync`, if any, which is used to
+        determine whether the synchronization must be repeated
+        """
+        return None
+
     async def generate_credential_request(
             self, indy_offer: CredentialOffer) -> CredentialRequest:
         """
@@ -173,9 +179,9 @@ class ConnectionBase:
                     raise IndyConnectionError("not implemented")
                 results.append(row)
             except IndyConnectionError as e:
-                row = StoredCredential(
+                results.append(StoredCredential(
                     cred, None,
-                )
+                ))
                 errors.append(str(e))
         return StoredCredentialBatch(results, errors)
 
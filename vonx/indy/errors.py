@@ -32,6 +32,12 @@ class IndyClientError(IndyError):
     """
     pass
 
+class IndyIdempotencyConflict(IndyClientError):
+    """
+    An idempotency key was reused for a request with different content
+    """
+    pass
+
 class IndyConfigError(IndyError):
     """
     Base class for :class:`IndyService` errors arising from configuration issues
@@ -0,0 +1,196 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Retrieval of the genesis transaction file using conditional requests, with a
+cached copy which may be shared by multiple service instances
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import time
+
+from .connection import HttpSession
+from .errors import IndyError
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _write_atomic(path: pathlib.Path, data: str) -> None:
+    """
+    Write a file by renaming a temporary file, so that readers never see partial content
+    """
+    tmp_path = path.with_name("{}.{}.tmp".format(path.name, os.getpid()))
+    with tmp_path.open("w") as tmp_file:
+        tmp_file.write(data)
+    os.replace(str(tmp_path), str(path))
+
+
+class GenesisCache:
+    """
+    A downloaded copy of the genesis transaction file, along with the response
+    headers needed to check the ledger server for changes
+    """
+
+    def __init__(self, genesis_url: str, path: pathlib.Path, timeout: float = 15):
+        """
+        Args:
+            genesis_url: the address of the genesis transaction file
+            path: the location of the cached copy
+            timeout: the timeout for the HTTP request in seconds
+        """
+        self._meta_path = path.with_name(path.name + ".meta")
+        self._path = path
+        self._timeout = timeout
+        self._url = genesis_url
+
+    @classmethod
+    def in_directory(cls, genesis_url: str, cache_dir: str,
+                     timeout: float = 15) -> 'GenesisCache':
+        """
+        Create a cache entry within a shared directory, named by the address
+        of the genesis transaction file
+
+        Args:
+            genesis_url: the address of the genesis transaction file
+            cache_dir: the shared cache directory
+            timeout: the timeout for the HTTP request in seconds
+        """
+        name = "genesis-{}.txn".format(
+            hashlib.sha256(genesis_url.encode("utf-8")).hexdigest()[:16])
+        return cls(genesis_url, pathlib.Path(cache_dir).joinpath(name), timeout)
+
+    @property
+    def path(self) -> pathlib.Path:
+        """
+        Accessor for the location of the cached copy
+        """
+        return self._path
+
+    @property
+    def exists(self) -> bool:
+        """
+        Check whether a copy has been downloaded
+        """
+        return self._path.is_file()
+
+    @property
+    def downloaded(self) -> bool:
+        """
+        Check whether the cached copy was downloaded from the same address, as opposed
+        to a genesis file provided with the configuration
+        """
+        return self.exists and bool(self._read_meta())
+
+    def _read_meta(self) -> dict:
+        try:
+            with self._meta_path.open() as meta_file:
+                meta = json.load(meta_file)
+            if meta.get("url") == self._url:
+                return meta
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def age(self) -> float:
+        """
+        Get the number of seconds since the cached copy was last checked against
+        the ledger server, or None if there is no copy
+        """
+        if not self.exists:
+            return None
+        checked = self._read_meta().get("checked")
+        if not checked:
+            checked = self._path.stat().st_mtime
+        return max(time.time() - checked, 0)
+
+    async def fetch(self) -> bool:
+        """
+        Download the genesis transaction file unless the cached copy is current
+
+        Returns:
+            True if the cached copy was updated
+        """
+        meta = self._read_meta() if self.exists else {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        LOGGER.info("Fetching genesis transaction file from %s", self._url)
+
+        async with HttpSession('fetching genesis transaction', timeout=self._timeout) as handler:
+            response = await handler.client.get(self._url, headers=headers)
+            await handler.check_status(response, (200, 304))
+            updated = response.status == 200
+            if updated:
+                data = await response.text()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        if updated:
+            # check data is valid json
+            LOGGER.debug("Genesis transaction response: %s", data)
+            lines = data.splitlines()
+            try:
+                valid = lines and json.loads(lines[0])
+            except ValueError:
+                valid = False
+            if not valid:
+                raise IndyError("Genesis transaction file is not valid JSON")
+            if not self._path.parent.exists():
+                self._path.parent.mkdir(parents=True)
+            _write_atomic(self._path, data)
+            meta = {"url": self._url}
+        else:
+            LOGGER.debug("Genesis transaction file not modified")
+        if etag:
+            meta["etag"] = etag
+        if last_modified:
+            meta["last_modified"] = last_modified
+        meta["checked"] = time.time()
+        try:
+            _write_atomic(self._meta_path, json.dumps(meta))
+        except OSError:
+            LOGGER.exception("Error saving genesis transaction metadata")
+        return updated
+
+    def install(self, target_path: pathlib.Path) -> bool:
+        """
+        Copy the cached genesis transaction file to the location used by the node pool
+
+        Args:
+            target_path: the configured genesis path
+        Returns:
+            True if the target file was changed
+        """
+        if target_path.resolve() == self._path.resolve():
+            return False
+        with self._path.open() as cache_file:
+            data = cache_file.read()
+        if target_path.is_file():
+            with target_path.open() as target_file:
+                if target_file.read() == data:
+                    return False
+        if not target_path.parent.exists():
+            target_path.parent.mkdir(parents=True)
+        _write_atomic(target_path, data)
+        return True
+
@@ -0,0 +1,157 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Tracking of long-running credential issuance jobs handled by the :class:`IndyService`
+"""
+
+from collections import OrderedDict
+import time
+from typing import Sequence
+
+from .errors import IndyConfigError
+from .messages import StoredCredentialBatch
+
+
+class IssueCredentialJob:
+    """
+    The progress and per-credential results of an asynchronous issuance request
+    """
+
+    def __init__(self, job_id: str, connection_id: str, credentials: Sequence):
+        self.job_id = job_id
+        self.connection_id = connection_id
+        self.credentials = credentials
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.results = [None] * len(credentials)
+        self.state = "pending"
+
+    @property
+    def total(self) -> int:
+        """
+        Accessor for the number of credentials requested
+        """
+        return len(self.results)
+
+    @property
+    def completed(self) -> int:
+        """
+        Accessor for the number of credentials processed so far
+        """
+        return sum(1 for row in self.results if row is not None)
+
+    @property
+    def failed(self) -> int:
+        """
+        Accessor for the number of credentials which could not be issued
+        """
+        return sum(1 for row in self.results if row is not None and not row["success"])
+
+    def group_credentials(self) -> OrderedDict:
+        """
+        Group the requested credentials by credential type, preserving their
+        original positions in the request
+
+        Returns:
+            a mapping of (schema_name, schema_version, origin_did) to a list
+            of (position, attributes) pairs
+        """
+        groups = OrderedDict()
+        for idx, cred in enumerate(self.credentials):
+            if not isinstance(cred, dict) or not cred.get("schema_name"):
+                raise IndyConfigError("Missing schema name for credential {}".format(idx))
+            if not isinstance(cred.get("attributes"), dict):
+                raise IndyConfigError("Missing attributes for credential {}".format(idx))
+            key = (cred["schema_name"], cred.get("schema_version"), cred.get("origin_did"))
+            if key not in groups:
+                groups[key] = []
+            groups[key].append((idx, cred["attributes"]))
+        return groups
+
+    def start(self) -> None:
+        """
+        Mark the job as running
+        """
+        self.started = time.time()
+        self.state = "running"
+
+    def finish(self) -> None:
+        """
+        Mark the job as finished, once all results have been recorded
+        """
+        self.finished = time.time()
+        self.credentials = None
+        self.state = "failed" if self.total and self.failed == self.total else "completed"
+
+    def set_result(self, idx: int, success: bool, result, served_by: str = None) -> None:
+        """
+        Record the result of issuing a single credential
+
+        Args:
+            idx: the position of the credential in the original request
+            success: whether the credential was issued and stored
+            result: the stored credential ID, or an error message
+            served_by: the identifier of the holder instance which stored the credential
+        """
+        row = {"success": success, "result": result}
+        if served_by:
+            row["served_by"] = served_by
+        self.results[idx] = row
+
+    def set_batch_results(self, positions: Sequence, batch: StoredCredentialBatch) -> None:
+        """
+        Record the results of a batch of issued credentials
+
+        Args:
+            positions: the original positions of the credentials in the batch
+            batch: the result of issuing the batch
+        """
+        erridx = 0
+        for idx, stored in zip(positions, batch.results):
+            if stored.cred_id:
+                self.set_result(idx, True, stored.cred_id, stored.served_by)
+            else:
+                errmsg = batch.errors[erridx] \
+                    if batch.errors and erridx < len(batch.errors) else None
+                erridx += 1
+                self.set_result(idx, False, errmsg, stored.served_by)
+        for idx in positions[len(batch.results):]:
+            self.set_result(idx, False, "Credential was not stored")
+
+    def get_status(self, results: bool = True) -> dict:
+        """
+        Get the current status of the job
+
+        Args:
+            results: whether to include the per-credential results
+        """
+        ret = {
+            "job_id": self.job_id,
+            "connection_id": self.connection_id,
+            "state": self.state,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+        if results:
+            ret["results"] = list(self.results)
+        return ret
@@ -19,15 +19,20 @@
 Implementation of the standard manager class for the :class:`IndyService`
 """
 
+import asyncio
+from collections import OrderedDict
+import json
 import logging
-from typing import Mapping
+from typing import Mapping, Sequence
 
 from ..common.config import load_config
 from ..common.manager import ConfigServiceManager
+from ..common.service import ServiceAck, ServiceFail, ServiceResponse
 from .client import IndyClient
-from .config import IndyConfigError, SchemaManager
+from .config import AgentType, ConnectionType, IndyConfigError, SchemaManager
 from .service import IndyService
 from .tob import CRED_TYPE_PARAMETERS
+from . import messages
 
 LOGGER = logging.getLogger(__name__)
 
@@ -82,6 +87,116 @@ def load_credential_type(ctype, schema_mgr: SchemaManager) -> dict:
     return ret
 
 
+def _register_wallet(requests: list, wallet_cfg: dict) -> str:
+    """
+    Add a wallet registration, assigning an identifier so that the agent can be
+    registered in the same request
+    """
+    if not wallet_cfg.get("id"):
+        wallet_cfg["id"] = wallet_cfg["name"]
+    requests.append(messages.RegisterWalletReq(wallet_cfg))
+    return wallet_cfg["id"]
+
+
+def _register_connection(requests: list, agent_id: str, connection_cfg: dict) -> None:
+    """
+    Add a connection registration for an issuer or verifier agent
+    """
+    if not connection_cfg.get("id"):
+        connection_cfg["id"] = agent_id
+    conn_type = connection_cfg.get("type", ConnectionType.TheOrgBook.value)
+    if conn_type != ConnectionType.TheOrgBook.value:
+        conn_type = ConnectionType.HTTP.value
+    requests.append(messages.RegisterConnectionReq(conn_type, agent_id, connection_cfg))
+
+
+def _request_key(request: messages.IndyServiceReq) -> tuple:
+    """
+    Get the key identifying the item added by a registration request
+    """
+    if isinstance(request, messages.RegisterWalletReq):
+        return ("wallet", request.config["id"])
+    if isinstance(request, messages.RegisterAgentReq):
+        return ("agent", request.config["id"])
+    if isinstance(request, messages.RegisterCredentialTypeReq):
+        return ("cred_type", request.issuer_id, request.schema_name,
+                request.schema_version, request.origin_did)
+    if isinstance(request, messages.RegisterConnectionReq):
+        return ("connection", request.config["id"])
+    return ("proof_spec", request.config["id"])
+
+
+def _index_requests(requests: Sequence) -> OrderedDict:
+    """
+    Index a list of registration requests by key, recording a fingerprint of each
+    request and the key of the item it depends on (if any)
+    """
+    index = OrderedDict()
+    for request in requests:
+        parent = None
+        if isinstance(request, messages.RegisterAgentReq):
+            parent = ("wallet", request.wallet_id)
+        elif isinstance(request, messages.RegisterCredentialTypeReq):
+            parent = ("agent", request.issuer_id)
+        elif isinstance(request, messages.RegisterConnectionReq):
+            parent = ("agent", request.agent_id)
+        fingerprint = json.dumps(
+            [request.__class__.__name__, dict(request)], sort_keys=True, default=str)
+        index[_request_key(request)] = (fingerprint, parent)
+    return index
+
+
+def _removal_request(key: tuple) -> messages.IndyServiceReq:
+    """
+    Create the request to remove a previously-registered item
+    """
+    if key[0] == "wallet":
+        return messages.RemoveWalletReq(key[1])
+    if key[0] == "agent":
+        return messages.RemoveAgentReq(key[1])
+    if key[0] == "cred_type":
+        return messages.RemoveCredentialTypeReq(*key[1:])
+    if key[0] == "connection":
+        return messages.RemoveConnectionReq(key[1])
+    return messages.RemoveProofSpecReq(key[1])
+
+
+def diff_config_requests(previous: OrderedDict, requests: Sequence) -> (list, OrderedDict):
+    """
+    Determine the removals and registrations needed to move from a previously
+    registered configuration to a new one. Items which depend on a changed item
+    (agents on their wallet, credential types and connections on their agent)
+    are registered again as well
+
+    Args:
+        previous: the index of the previously registered requests
+        requests: the new list of registration requests
+    Returns:
+        a tuple of the list of requests to submit, and the index of the new requests
+    """
+    current = _index_requests(requests)
+    changed = set()
+    # parents are always registered before the items depending on them
+    for key, (fingerprint, parent) in previous.items():
+        if key not in current or current[key][0] != fingerprint or parent in changed:
+            changed.add(key)
+
+    changes = []
+    for kind in ("cred_type", "connection", "agent", "wallet", "proof_spec"):
+        for key, (_fingerprint, parent) in previous.items():
+            if key[0] != kind or key not in changed:
+                continue
+            if kind == "cred_type" and parent in changed:
+                # removed along with the issuer agent
+                continue
+            changes.append(_removal_request(key))
+    for request in requests:
+        key = _request_key(request)
+        if key not in previous or key in changed:
+            changes.append(request)
+    return changes, current
+
+
 class IndyManager(ConfigServiceManager):
     """
     A manager for initializing the Indy service from standard configuration files
@@ -89,6 +204,8 @@ class IndyManager(ConfigServiceManager):
 
     def __init__(self, env: Mapping = None, pid: str = 'manager'):
         super(IndyManager, self).__init__(env, pid)
+        self._config_index = None
+        self._config_lock = None
         self._schema_mgr = None
 
     def _init_services(self):
@@ -145,6 +262,7 @@ class IndyManager(ConfigServiceManager):
         """
         ret = await super(IndyManager, self)._service_start()
         if ret:
+            self._config_lock = asyncio.Lock()
             self._schema_mgr = self._load_schemas()
             self.run_task(self._load_config())
         return ret
@@ -164,14 +282,55 @@ class IndyManager(ConfigServiceManager):
 
     async def _load_config(self) -> None:
         """
-        Initialize our client and populate services based on configuration
+        Initialize our client and populate services based on configuration. The
+        configuration is submitted to the :class:`IndyService` in a single request
         """
         client = self.get_client()
-        await self._register_proof_requests(client)
-        await self._register_agents(client)
+        async with self._config_lock:
+            requests = self._config_requests()
+            index = _index_requests(requests)
+            await client.register_config(requests)
+            self._config_index = index
         await client.sync(False)
 
-    async def _register_agents(self, client: IndyClient) -> None:
+    def _config_requests(self) -> list:
+        """
+        Build the list of registration requests for the current configuration
+        """
+        requests = []
+        self._register_proof_requests(requests)
+        self._register_agents(requests)
+        return requests
+
+    async def _reload_config(self) -> ServiceResponse:
+        """
+        Reload the schema and services configuration and apply only the changes
+        to the :class:`IndyService`, which continues to handle requests
+        """
+        #pylint: disable=broad-except
+        await super(IndyManager, self)._reload_config()
+        client = self.get_client()
+        async with self._config_lock:
+            if self._config_index is None:
+                return ServiceFail("Configuration has not been loaded")
+            prev_schema_mgr = self._schema_mgr
+            try:
+                self._schema_mgr = self._load_schemas()
+                changes, index = diff_config_requests(
+                    self._config_index, self._config_requests())
+                if changes:
+                    await client.register_config(changes)
+            except Exception as e:
+                LOGGER.exception("Error reloading configuration")
+                self._schema_mgr = prev_schema_mgr
+                return ServiceFail("Configuration reload failed: {}".format(e))
+            self._config_index = index
+        LOGGER.info("Applied %d configuration changes", len(changes))
+        if changes:
+            await client.sync(False)
+        return ServiceAck()
+
+    def _register_agents(self, requests: list) -> None:
         """
         Load agent settings from our configuration files
         """
@@ -182,11 +341,11 @@ class IndyManager(ConfigServiceManager):
             else None
         )
 
-        await self._register_issuers(client, limit_agents)
-        await self._register_holders(client, limit_agents)
-        await self._register_verifiers(client, limit_agents)
+        self._register_issuers(requests, limit_agents)
+        self._register_holders(requests, limit_agents)
+        self._register_verifiers(requests, limit_agents)
 
-    async def _register_issuers(self, client: IndyClient, limit_agents: set):
+    def _register_issuers(self, requests: list, limit_agents: set):
         """
         Register all issuer services from the configuration
         """
@@ -203,11 +362,11 @@ class IndyManager(ConfigServiceManager):
                 issuer_ids.append(issuer_cfg["id"])
         if issuers:
             for issuer_cfg in issuers:
-                await self._register_issuer(client, issuer_cfg)
+                self._register_issuer(requests, issuer_cfg)
         elif config_issuers:
             LOGGER.warning("No defined issuers referenced by AGENTS")
 
-    async def _register_issuer(self, client: IndyClient, issuer_cfg: dict) -> str:
+    def _register_issuer(self, requests: list, issuer_cfg: dict) -> str:
         """
         Register a single issuer service from the configuration
         """
@@ -229,12 +388,15 @@ class IndyManager(ConfigServiceManager):
             wallet_cfg["name"] = issuer_id + "-Issuer-Wallet"
         if not wallet_cfg.get("seed"):
             raise IndyConfigError("Missing wallet seed for issuer: {}".format(issuer_id))
-        wallet_id = await client.register_wallet(wallet_cfg)
-        issuer_id = await client.register_issuer(wallet_id, issuer_cfg)
+        wallet_id = _register_wallet(requests, wallet_cfg)
+        agent_type = AgentType.issuer.value
+        if issuer_cfg.get("holder_verifier"):
+            agent_type = AgentType.combined.value
+        requests.append(messages.RegisterAgentReq(agent_type, wallet_id, issuer_cfg))
 
         for type_spec in cred_types:
             cred_type = load_credential_type(type_spec, self._schema_mgr)
-            await client.register_credential_type(
+            requests.append(messages.RegisterCredentialTypeReq(
                 issuer_id,
                 cred_type["schema_name"],
                 cred_type["schema_version"],
@@ -242,21 +404,13 @@ class IndyManager(ConfigServiceManager):
                 cred_type["attributes"],
                 cred_type["params"],
                 cred_type["dependencies"],
-            )
+            ))
 
         if connection_cfg:
-            if not connection_cfg.get("id"):
-                connection_cfg["id"] = issuer_id
-            conn_type = connection_cfg.get("type", "TheOrgBook")
-            if conn_type == "TheOrgBook":
-                _conn_id = await client.register_orgbook_connection(
-                    issuer_id, connection_cfg)
-            else:
-                _conn_id = await client.register_http_connection(
-                    issuer_id, connection_cfg)
+            _register_connection(requests, issuer_id, connection_cfg)
         return issuer_id
 
-    async def _register_holders(self, client: IndyClient, limit_agents: set):
+    def _register_holders(self, requests: list, limit_agents: set):
         """
         Register all holder services from the configuration
         """
@@ -273,11 +427,11 @@ class IndyManager(ConfigServiceManager):
                 holder_ids.append(holder_cfg["id"])
         if holders:
             for holder_cfg in holders:
-                await self._register_holder(client, holder_cfg)
+                self._register_holder(requests, holder_cfg)
         elif config_holders:
             LOGGER.info("No defined holders referenced by AGENTS")
 
-    async def _register_holder(self, client: IndyClient, holder_cfg: dict) -> str:
+    def _register_holder(self, requests: list, holder_cfg: dict) -> str:
         """
         Register a single holder service from the configuration
         """
@@ -290,11 +444,12 @@ class IndyManager(ConfigServiceManager):
             wallet_cfg["name"] = holder_id + "-Holder-Wallet"
         if not wallet_cfg.get("seed"):
             raise IndyConfigError("Missing wallet seed for holder: {}".format(holder_id))
-        wallet_id = await client.register_wallet(wallet_cfg)
-        holder_id = await client.register_holder(wallet_id, holder_cfg)
+        wallet_id = _register_wallet(requests, wallet_cfg)
+        requests.append(messages.RegisterAgentReq(
+            AgentType.holder.value, wallet_id, holder_cfg))
         return holder_id
 
-    async def _register_verifiers(self, client: IndyClient, limit_agents: set):
+    def _register_verifiers(self, requests: list, limit_agents: set):
         """
         Register all verifier services from the configuration
         """
@@ -311,11 +466,11 @@ class IndyManager(ConfigServiceManager):
                 verifier_ids.append(verifier_cfg["id"])
         if verifiers:
             for verifier_cfg in verifiers:
-                await self._register_verifier(client, verifier_cfg)
+                self._register_verifier(requests, verifier_cfg)
         elif config_verifiers:
             LOGGER.info("No defined verifiers referenced by AGENTS")
 
-    async def _register_verifier(self, client: IndyClient, verifier_cfg: dict) -> str:
+    def _register_verifier(self, requests: list, verifier_cfg: dict) -> str:
         """
         Register a single verifier service from the configuration
         """
@@ -333,22 +488,15 @@ class IndyManager(ConfigServiceManager):
             wallet_cfg["name"] = verifier_id + "-Verifier-Wallet"
         if not wallet_cfg.get("seed"):
             raise IndyConfigError("Missing wallet seed for verifier: {}".format(verifier_id))
-        wallet_id = await client.register_wallet(wallet_cfg)
-        verifier_id = await client.register_verifier(wallet_id, verifier_cfg)
+        wallet_id = _register_wallet(requests, wallet_cfg)
+        requests.append(messages.RegisterAgentReq(
+            AgentType.verifier.value, wallet_id, verifier_cfg))
 
         if connection_cfg:
-            if not connection_cfg.get("id"):
-                connection_cfg["id"] = verifier_id
-            conn_type = connection_cfg.get("type", "TheOrgBook")
-            if conn_type == "TheOrgBook":
-                _conn_id = await client.register_orgbook_connection(
-                    verifier_id, connection_cfg)
-            else:
-                _conn_id = await client.register_http_connection(
-                    verifier_id, connection_cfg)
+            _register_connection(requests, verifier_id, connection_cfg)
         return verifier_id
 
-    async def _register_proof_requests(self, client: IndyClient):
+    def _register_proof_requests(self, requests: list):
         """
         Register all proof request specifications from the configuration
         """
@@ -357,4 +505,4 @@ class IndyManager(ConfigServiceManager):
             for pr_id, pr_spec in config_prs.items():
                 if not pr_spec.get("id"):
                     pr_spec["id"] = pr_id
-                _spec_id = await client.register_proof_spec(pr_spec)
+                requests.append(messages.RegisterProofSpecReq(pr_spec))
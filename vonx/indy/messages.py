@@ -42,6 +42,12 @@ class IndyServiceFail(ServiceFail):
     """
     pass
 
+class IdempotencyConflict(IndyServiceFail):
+    """
+    An idempotency key was reused for a request with different content
+    """
+    pass
+
 class IndyServiceReq(ServiceRequest):
     """
     A generic Indy service request base class
@@ -167,6 +173,73 @@ class ConnectionStatus(IndyServiceRep):
     )
 
 
+class RemoveWalletReq(IndyServiceReq):
+    """
+    A request to remove a registered wallet
+    """
+    _fields = (
+        ("wallet_id", str),
+    )
+
+
+class RemoveAgentReq(IndyServiceReq):
+    """
+    A request to remove a registered agent
+    """
+    _fields = (
+        ("agent_id", str),
+    )
+
+
+class RemoveCredentialTypeReq(IndyServiceReq):
+    """
+    A request to remove a credential type from an issuer
+    """
+    _fields = (
+        ("issuer_id", str),
+        ("schema_name", str),
+        ("schema_version", str),
+        ("origin_did", str),
+    )
+
+
+class RemoveConnectionReq(IndyServiceReq):
+    """
+    A request to remove a registered connection
+    """
+    _fields = (
+        ("connection_id", str),
+    )
+
+
+class RemoveProofSpecReq(IndyServiceReq):
+    """
+    A request to remove a registered proof request specification
+    """
+    _fields = (
+        ("spec_id", str),
+    )
+
+
+class RegisterConfigReq(IndyServiceReq):
+    """
+    A request to register or remove a set of wallets, agents, credential types,
+    connections and proof specs together. Either all of the changes are applied or none
+    """
+    _fields = (
+        ("requests", Sequence), # Sequence of the individual registration requests
+    )
+
+
+class RegisterConfig(IndyServiceRep):
+    """
+    The responses to a set of registration requests, in the original order
+    """
+    _fields = (
+        ("results", Sequence),
+    )
+
+
 class IssueCredentialReq(IndyServiceReq):
     """
     Issue a credential via a previously-registered connection
@@ -177,6 +250,7 @@ class IssueCredentialReq(IndyServiceReq):
         ("schema_version", str),
         ("origin_did", str),
         ("cred_data", dict),
+        ("idempotency_key", str, None),
     )
 
 
@@ -190,6 +264,39 @@ class IssueCredentialBatchReq(IndyServiceReq):
         ("schema_version", str),
         ("origin_did", str),
         ("cred_data", Sequence),
+        ("idempotency_key", str, None),
+    )
+
+
+class IssueCredentialJobReq(IndyServiceReq):
+    """
+    Start a tracked job to issue a list of credentials via a previously-registered
+    connection, without waiting for the credentials to be issued
+    """
+    _fields = (
+        ("connection_id", str),
+        ("credentials", Sequence), # Sequence[dict] of schema_name, schema_version,
+                                   # origin_did and attributes
+        ("idempotency_key", str, None),
+    )
+
+
+class IssueCredentialJobStatusReq(IndyServiceReq):
+    """
+    A request for the progress and results of an issuance job
+    """
+    _fields = (
+        ("job_id", str),
+    )
+
+
+class IssueCredentialJobStatus(IndyServiceRep):
+    """
+    The progress and results of an issuance job
+    """
+    _fields = (
+        ("job_id", str),
+        ("status", dict),
     )
 
 
@@ -297,6 +404,18 @@ class ResolvedSchema(IndyServiceRep):
     )
 
 
+class InvalidateSchemaCacheReq(IndyServiceReq):
+    """
+    A request to discard a cached schema resolved from the ledger, or all cached
+    schemas if no schema name is given
+    """
+    _fields = (
+        ("schema_name", str, None),
+        ("schema_version", str, None),
+        ("origin_did", str, None),
+    )
+
+
 class ProofRequest(IndyServiceRep):
     """
     A message representing an Indy proof request
@@ -368,6 +487,24 @@ class RequestProofReq(IndyServiceReq):
     )
 
 
+class RequestProofBatchReq(IndyServiceReq):
+    """
+    A request to get and verify proofs from a list of connections
+    """
+    _fields = (
+        ("items", Sequence), # Sequence[dict] of connection_id, spec_id, cred_ids and params
+    )
+
+
+class RequestProofBatch(IndyServiceRep):
+    """
+    The results of a batch of proof requests, in the original order
+    """
+    _fields = (
+        ("results", Sequence), # Sequence[dict] of success and result
+    )
+
+
 class VerifyProofReq(IndyServiceReq):
     """
     The message class representing a request to verify a proof
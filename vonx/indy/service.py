@@ -29,11 +29,8 @@ import pathlib
 import random
 import string
 import time
-from typing import Mapping, Sequence
+from typing import Awaitable, Mapping, Sequence
 
-import aiohttp
-
-from didauth.ext.aiohttp import SignedRequest, SignedRequestAuth
 from von_anchor.error import AbsentCred, AbsentSchema, AbsentCredDef
 from von_anchor.nodepool import NodePool
 from von_anchor.util import cred_def_id, revealed_attrs, schema_id, schema_key, \
@@ -46,18 +43,18 @@ from ..common.service import (
     ServiceResponse,
     ServiceSyncError,
 )
+from ..common.cache import TTLCache
+from ..common.coalesce import RequestCoalescer
 from ..common.util import log_json
 
-from ..common.dependencies import (
-    CredentialDependency,
-    CredentialDependencyGraph,
-    EdgeAlreadyExistsError,
-    CantResolveDidError,
-    CantConnectToEndpointError,
-    BadResponseError,
-    CircularDependencyError
+from .artifacts import (
+    CRED_DEF,
+    SCHEMA,
+    LedgerArtifactCache,
+    cache_artifact,
+    is_cached,
+    ledger_id_from_genesis,
 )
-
 from .config import (
     AgentCfg,
     ConnectionCfg,
@@ -67,22 +64,46 @@ from .config import (
 )
 from .connection import HttpSession
 from .errors import IndyConfigError, IndyConnectionError, IndyError
+from .genesis import GenesisCache
+from .jobs import IssueCredentialJob
+from .snapshot import SyncSnapshot
+from .workers import VerifierPool
 from . import messages
 
 LOGGER = logging.getLogger(__name__)
 
+_REGISTER_REQUESTS = (
+    messages.RegisterWalletReq,
+    messages.RegisterAgentReq,
+    messages.RegisterCredentialTypeReq,
+    messages.RegisterConnectionReq,
+    messages.RegisterProofSpecReq,
+    messages.RemoveWalletReq,
+    messages.RemoveAgentReq,
+    messages.RemoveCredentialTypeReq,
+    messages.RemoveConnectionReq,
+    messages.RemoveProofSpecReq,
+)
+
 
 def _make_id(pfx: str = '', length=12) -> str:
     return pfx + ''.join(random.choice(string.ascii_letters) for _ in range(length))
 
 
-def _prepare_proof_request(spec: ProofSpecCfg, wql_filters: dict = None) -> messages.ProofRequest:
+def _cred_type_key(definition: SchemaCfg) -> str:
     """
-    Prepare the JSON payload for a proof request
+    Get the key used to record a credential type in the sync snapshot
+    """
+    return "{}:{}:{}".format(definition.name, definition.version, definition.origin_did or "")
+
+
+def _compile_proof_request(spec: ProofSpecCfg) -> dict:
+    """
+    Build the parts of a proof request which do not change between requests.
+    The result is shared and must not be modified
 
     Args:
-        spec: the proof request specification
-        wql_filters: a dict of WQL filters for the wallet
+        spec: the synced proof request specification
     """
     req_attrs = {}
     req_preds = {}
@@ -105,15 +126,104 @@ def _prepare_proof_request(spec: ProofSpecCfg, wql_filters: dict = None) -> mess
                     "schema_id": s_id,
                 }]
             }
-    return messages.ProofRequest({
+    return {
         "name": spec.spec_id,
-        "nonce": str(random.randint(10000000000, 100000000000)),  # FIXME - how best to generate?
         "version": spec.version,
         "requested_attributes": req_attrs,
         "requested_predicates": req_preds,
+    }
+
+
+def _copy_requested(requested: dict) -> dict:
+    """
+    Copy the requested attributes or predicates of a compiled proof request,
+    so that the restrictions may be updated without affecting the template
+    """
+    return {
+        key: dict(item, restrictions=[rest.copy() for rest in item["restrictions"]])
+        for key, item in requested.items()
+    }
+
+
+def _prepare_proof_request(spec: ProofSpecCfg, wql_filters: dict = None) -> messages.ProofRequest:
+    """
+    Prepare the JSON payload for a proof request
+
+    Args:
+        spec: the proof request specification
+        wql_filters: a dict of WQL filters for the wallet
+    """
+    template = spec.template
+    if template is None:
+        template = spec.template = _compile_proof_request(spec)
+    return messages.ProofRequest({
+        "name": template["name"],
+        "nonce": str(random.randint(10000000000, 100000000000)),  # FIXME - how best to generate?
+        "version": template["version"],
+        "requested_attributes": _copy_requested(template["requested_attributes"]),
+        "requested_predicates": _copy_requested(template["requested_predicates"]),
     }, wql_filters)
 
 
+def _issue_result_ttl(entry: tuple) -> float:
+    """
+    Determine the lifetime of an idempotent issue result. Batches in which some
+    credentials failed are not retained, so that the client may retry them
+    """
+    result = entry[1]
+    if isinstance(result, messages.StoredCredentialBatch) and result.errors:
+        return 0
+    return None
+
+
+def _request_digest(data) -> str:
+    """
+    Compute a digest of the content of an idempotent request
+    """
+    content = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _idempotency_conflict(idempotency_key: str) -> messages.IdempotencyConflict:
+    """
+    Create the response to a request reusing an idempotency key with different content
+    """
+    return messages.IdempotencyConflict(
+        "Idempotency key has already been used for a different request: {}".format(
+            idempotency_key))
+
+
+def _merge_failed_creds(batch: messages.StoredCredentialBatch,
+                        creds: Sequence) -> messages.StoredCredentialBatch:
+    """
+    Combine the result of storing the credentials which were created with the
+    exceptions raised for those which were not, in the original order
+
+    Args:
+        batch: the result of storing the successfully created credentials
+        creds: the list of created credentials or exceptions
+    """
+    stored = iter(batch.results)
+    stored_errors = iter(batch.errors or ())
+    results = []
+    errors = []
+    for cred in creds:
+        if isinstance(cred, Exception):
+            if isinstance(cred, IndyError):
+                errmsg = str(cred)
+            else:
+                LOGGER.error("Exception during credential creation:", exc_info=cred)
+                errmsg = "Exception during credential issuance"
+            results.append(messages.StoredCredential(None, None))
+            errors.append(errmsg)
+        else:
+            row = next(stored)
+            if not row.cred_id:
+                errors.append(next(stored_errors, None))
+            results.append(row)
+    return messages.StoredCredentialBatch(results, errors)
+
+
 def _populate_cred_def_ids(proof_req: dict, creds: list):
     """
     Populate cred_def_id for each attribute in proof request if not defined
@@ -146,19 +256,104 @@ def _populate_cred_def_ids(proof_req: dict, creds: list):
             attr["non_revoked"] = {}
 
 
+class _AgentLease:
+    """
+    Keeps an agent open while it is in use, opening it first if necessary
+    """
+
+    def __init__(self, service: 'IndyService', agent: AgentCfg):
+        self._agent = agent
+        self._service = service
+
+    async def __aenter__(self) -> AgentCfg:
+        self._agent.leases += 1
+        opened = False
+        try:
+            await self._service._open_agent(self._agent) #pylint: disable=protected-access
+            opened = True
+        finally:
+            if not opened:
+                self._agent.leases -= 1
+        return self._agent
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._agent.leases -= 1
+        self._agent.last_used = time.time()
+
+
 class IndyService(ServiceBase):
     """
     A class for managing interactions with the Hyperledger Indy ledger
     """
 
+    _request_limits = {
+        "IssueCredentialBatchReq": 4,
+        "ConstructProofReq": 20,
+        "RequestProofReq": 20,
+        "VerifyProofReq": 20,
+    }
+
     def __init__(self, pid: str, exchange: Exchange, env: Mapping, spec: dict = None):
         super(IndyService, self).__init__(pid, exchange, env)
         self._config = {}
         self._genesis_path = None
+        self._genesis_cache_path = env.get("GENESIS_CACHE_PATH")
+        self._genesis_max_age = int(env.get("GENESIS_MAX_AGE", 86400))
+        self._genesis_refresh = None
+        self._genesis_refresh_interval = int(env.get("GENESIS_REFRESH_INTERVAL", 3600))
         self._agents = {}
+        self._agents_by_did = {}
+        self._agent_idle_timeout = int(env.get("AGENT_IDLE_TIMEOUT", 0))
+        lazy = env.get("AGENT_LAZY_OPEN")
+        self._agent_lazy = bool(lazy) and str(lazy).lower() not in ("0", "false")
+        self._agent_locks = {}
+        self._agent_max_open = int(env.get("AGENT_MAX_OPEN", 0))
+        self._agent_reaper = None
+        self._agents_by_schema = {}
         self._connections = {}
         self._ledger_url = None
         self._genesis_url = None
+        self._idempotency_ttl = int(env.get("IDEMPOTENCY_TTL", 3600))
+        self._issue_results = TTLCache(
+            int(env.get("IDEMPOTENCY_CACHE_SIZE", 10000)), self._idempotency_ttl)
+        self._add_cache("issue_results", self._issue_results)
+        self._cred_info_caches = {}
+        self._cred_lookup_concurrency = int(env.get("CRED_LOOKUP_CONCURRENCY", 10))
+        self._cred_lookup_lock = None
+        self._cred_request_ttl = int(env.get("CRED_REQUEST_CACHE_TTL", 600))
+        self._endpoint_cache = TTLCache(
+            int(env.get("ENDPOINT_CACHE_SIZE", 1000)),
+            int(env.get("ENDPOINT_CACHE_TTL", 300)))
+        self._endpoint_negative_ttl = int(env.get("ENDPOINT_NEGATIVE_TTL", 60))
+        self._add_cache("endpoints", self._endpoint_cache)
+        nym_ttl = int(env.get("NYM_CACHE_TTL", 600))
+        self._nym_cache = TTLCache(
+            int(env.get("NYM_CACHE_SIZE", 1000)), nym_ttl, nym_ttl / 5)
+        self._nym_negative_ttl = int(env.get("NYM_NEGATIVE_TTL", 60))
+        self._add_cache("nyms", self._nym_cache)
+        self._schema_cache = TTLCache(
+            int(env.get("SCHEMA_CACHE_SIZE", 1000)),
+            int(env.get("SCHEMA_CACHE_TTL", 3600)))
+        self._schema_negative_ttl = int(env.get("SCHEMA_NEGATIVE_TTL", 60))
+        self._add_cache("foreign_schemas", self._schema_cache)
+        self._proof_batch_concurrency = int(env.get("PROOF_BATCH_CONCURRENCY", 10))
+        self._proof_batch_lock = None
+        self._proof_cache_ttl = int(env.get("PROOF_CACHE_TTL", 600))
+        self._proof_cache = TTLCache(
+            int(env.get("PROOF_CACHE_SIZE", 1000)), self._proof_cache_ttl)
+        self._add_cache("verified_proofs", self._proof_cache)
+        self._issue_coalescer = None
+        if env.get("ISSUE_COALESCE") and str(env["ISSUE_COALESCE"]).lower() not in ("0", "false"):
+            self._issue_coalescer = RequestCoalescer(
+                self._issue_credential_group,
+                int(env.get("ISSUE_COALESCE_DELAY", 5)) / 1000.0,
+                int(env.get("ISSUE_COALESCE_MAX", 50)))
+        self._issue_jobs = {}
+        self._issue_job_chunk_size = int(env.get("ISSUE_JOB_CHUNK_SIZE", 50))
+        self._issue_job_results = TTLCache(
+            int(env.get("ISSUE_JOB_CACHE_SIZE", 1000)),
+            int(env.get("ISSUE_JOB_EXPIRY", 3600)))
+        self._add_cache("issue_jobs", self._issue_job_results)
         self._protocol_version = None
         self._max_concurrent_storage = env.get("MAX_CONCURRENT_STORAGE", 20)
         self._name = pid
@@ -166,9 +361,21 @@ class IndyService(ServiceBase):
         self._pool = None
         self._proof_specs = {}
         self._storage_lock = None
+        self._sync_concurrency = int(env.get("SYNC_CONCURRENCY", 10))
+        self._sync_dirty = set()
+        self._sync_limit = None
+        self._closing = []
+        self._snapshot = None
+        self._snapshot_path = env.get("SYNC_SNAPSHOT_PATH")
+        self._snapshot_unverified = set()
         self._wallets = {}
         self._verifier = None
+        self._verifier_pool = None
+        self._artifacts = None
+        self._artifacts_path = env.get("LEDGER_CACHE_PATH")
+        self._verifier_workers = int(env.get("VERIFIER_WORKERS", 0))
         self._update_config(spec)
+        self._update_status(warm=False)
 
     def _update_config(self, spec) -> None:
         """
@@ -190,43 +397,206 @@ class IndyService(ServiceBase):
         Initial service startup sequence
         """
         self._storage_lock = asyncio.Semaphore(self._max_concurrent_storage)
+        self._cred_lookup_lock = asyncio.Semaphore(max(self._cred_lookup_concurrency, 1))
+        self._proof_batch_lock = asyncio.Semaphore(max(self._proof_batch_concurrency, 1))
+        self._sync_limit = asyncio.Semaphore(max(self._sync_concurrency, 1))
+        if self._agent_lazy and (self._agent_idle_timeout > 0 or self._agent_max_open > 0):
+            self._agent_reaper = self.run_task(self._reap_agents())
         LOGGER.info("Max concurrent: %s", self._max_concurrent_storage)
         return await super(IndyService, self)._service_start()
 
-    async def _service_sync(self) -> bool:
+    def _request_queue_key(self, request: ServiceRequest) -> str:
+        """
+        Queue requests by the connection or holder they are directed to
+        """
+        return request.get("connection_id") or request.get("holder_id") \
+            or request.get("verifier_id")
+
+    async def _get_status(self) -> ServiceResponse:
+        """
+        Return the current status of the service, including batching and worker statistics
+        """
+        result = await super(IndyService, self)._get_status()
+        if self._issue_coalescer:
+            result.status["stats"]["issue_coalesce"] = self._issue_coalescer.stats
+        if self._verifier_pool:
+            result.status["stats"]["verifier_pool"] = self._verifier_pool.stats
+        result.status["open_agents"] = sorted(
+            agent_id for agent_id, agent in self._agents.items() if agent.opened)
+        return result
+
+    async def _service_sync(self, full: bool = False) -> bool:
         """
         Perform the initial setup of the ledger connection, including downloading the
-        genesis transaction file
+        genesis transaction file, and synchronize the registered services. Unless a full
+        sync is requested, only changed or unsynced services are processed
+
+        Args:
+            full: whether to re-check services which have already been synced
         """
+        await self._close_removed()
+        dirty = self._sync_dirty
+        self._sync_dirty = set()
+        try:
+            return await self._sync_services(full, dirty)
+        except Exception:
+            # keep the pending changes for the next attempt
+            self._sync_dirty.update(dirty)
+            raise
+
+    async def _sync_services(self, full: bool, dirty: set) -> bool:
+        """
+        Synchronize the selected wallets, agents, connections and proof specs
+
+        Args:
+            full: whether to process every registered service
+            dirty: the (type, identifier) pairs of the services which have changed
+        """
+        timings = {}
+        started = time.perf_counter()
         await self._setup_pool()
-        synced = True
-        for wallet in self._wallets.values():
-            if not wallet.created:
-                await wallet.create()
-        for agent in self._agents.values():
-            if not await self._sync_agent(agent):
+        timings["pool"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await self._gather_sync(*(
+            self._sync_task(wallet.create())
+            for wallet in self._wallets.values() if not wallet.created))
+        timings["wallets"] = time.perf_counter() - started
+
+        def changed(kind: str, item_id: str) -> bool:
+            return full or (kind, item_id) in dirty
+
+        agent_conns = {}
+        for conn in self._connections.values():
+            if changed("connection", conn.connection_id) or not conn.synced:
+                agent_conns.setdefault(conn.agent_id, []).append(conn)
+        agents = [
+            agent for agent in self._agents.values()
+            if changed("agent", agent.agent_id) or not agent.synced
+            or agent.agent_id in agent_conns]
+
+        async def sync_agent_chain(agent: AgentCfg) -> bool:
+            synced = await self._sync_agent(agent, changed("agent", agent.agent_id))
+            if not synced:
                 LOGGER.debug("Agent not yet synced: %s", agent.agent_id)
-                synced = False
-        for connection in self._connections.values():
-            if not await self._sync_connection(connection):
-                LOGGER.debug("Connection not yet synced: %s", connection.connection_id)
-                synced = False
-        for spec in self._proof_specs.values():
-            if not await self._sync_proof_spec(spec):
+            conns = agent_conns.get(agent.agent_id, [])
+            results = await self._gather_sync(*(
+                self._sync_task(self._sync_connection(
+                    conn, changed("connection", conn.connection_id)))
+                for conn in conns))
+            for conn, conn_synced in zip(conns, results):
+                if not conn_synced:
+                    LOGGER.debug("Connection not yet synced: %s", conn.connection_id)
+                    synced = False
+            return synced
+
+        started = time.perf_counter()
+        results = await self._gather_sync(*(sync_agent_chain(agent) for agent in agents))
+        synced = all(results)
+        timings["agents"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        specs = [
+            spec for spec in self._proof_specs.values()
+            if changed("proof_spec", spec.spec_id) or not spec.synced]
+        results = await self._gather_sync(*(
+            self._sync_task(self._sync_proof_spec(spec)) for spec in specs))
+        for spec, spec_synced in zip(specs, results):
+            if not spec_synced:
                 LOGGER.debug("Proof spec not synced: %s", spec.spec_id)
                 synced = False
+        timings["proof_specs"] = time.perf_counter() - started
+
+        if synced and not self._agent_lazy:
+            # in lazy mode agents are not opened in advance of the first credential
+            started = time.perf_counter()
+            warm_conns = [conn for conns in agent_conns.values() for conn in conns]
+            self._update_status(warm=await self._warm_cred_requests(warm_conns))
+            timings["warm"] = time.perf_counter() - started
+        if synced and self._snapshot and (agents or specs):
+            self._save_snapshot()
+            if self._snapshot_unverified:
+                self.run_task(self._revalidate_snapshot())
+        self._update_status(sync_full=full, sync_timings=timings)
         return synced
 
+    async def _sync_task(self, proc: Awaitable):
+        """
+        Run a sync step, limiting the number of steps performed at once
+        """
+        async with self._sync_limit:
+            return await proc
+
+    async def _gather_sync(self, *procs) -> list:
+        """
+        Wait for a set of sync steps to complete, raising the first exception
+        encountered only once all of the steps have finished
+        """
+        results = await asyncio.gather(*procs, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+        return results
+
+    async def _warm_cred_requests(self, conns: Sequence[ConnectionCfg] = None) -> bool:
+        """
+        Prepare credential offers and requests for each issuer connection and credential
+        type in advance, so that the first credential issued does not have to wait for them
+
+        Args:
+            conns: the connections to prepare, defaulting to all registered connections
+
+        Returns:
+            True if all credential requests were prepared successfully
+        """
+        async def warm_connection(conn: ConnectionCfg) -> bool:
+            #pylint: disable=broad-except
+            issuer = self._agents[conn.agent_id]
+            success = True
+            for cred_type in issuer.cred_types:
+                try:
+                    await self._get_cred_request(issuer, conn, cred_type)
+                except Exception:
+                    LOGGER.exception("Error preparing credential request for %s: %s",
+                                     conn.connection_id, cred_type["definition"].name)
+                    success = False
+            return success
+
+        pending = []
+        if conns is None:
+            conns = self._connections.values()
+        for conn in conns:
+            issuer = self._agents[conn.agent_id]
+            if conn.synced and issuer.is_issuer and issuer.synced:
+                pending.append(warm_connection(conn))
+        if not pending:
+            return True
+        with self._timer("warm_cred_requests"):
+            results = await asyncio.gather(*pending)
+        return all(results)
+
     async def _service_stop(self) -> None:
         """
         Shut down active connections
         """
+        if self._genesis_refresh:
+            self._genesis_refresh.cancel()
+            self._genesis_refresh = None
+        if self._agent_reaper:
+            self._agent_reaper.cancel()
+            self._agent_reaper = None
+        if self._verifier_pool:
+            self._verifier_pool.stop()
+            self._verifier_pool = None
         for connection in self._connections.values():
             await connection.close()
         for agent in self._agents.values():
             await agent.close()
         for wallet in self._wallets.values():
             await wallet.close()
+        if self._artifacts:
+            self._artifacts.close()
+            self._artifacts = None
 
     def _add_agent(self, agent_type: str, wallet_id: str, **params) -> str:
         """
@@ -247,6 +617,7 @@ class IndyService(ServiceBase):
         agents = self._agents.copy()
         agents[cfg.agent_id] = cfg
         self._agents = agents
+        self._sync_dirty.add(("agent", cfg.agent_id))
         return cfg.agent_id
 
     def _get_agent_status(self, agent_id: str) -> ServiceResponse:
@@ -278,7 +649,7 @@ class IndyService(ServiceBase):
             dependencies: list of dependencies - must be names of valid defined proof requests
             config: additional configuration for the credential type
         """
-        agent = self._agents[issuer_id]
+        agent = self._agents.get(issuer_id)
 
         if not agent:
             raise IndyConfigError("Agent ID not registered: {}".format(issuer_id))
@@ -290,6 +661,15 @@ class IndyService(ServiceBase):
 
         schema = SchemaCfg(schema_name, schema_version, attr_names, origin_did, dependency_configs)
         agent.add_credential_type(schema, **(config or {}))
+        agent_ids = self._agents_by_schema.setdefault(schema_name, [])
+        if issuer_id not in agent_ids:
+            agent_ids.append(issuer_id)
+
+        # the schema must be published and the issuer's connections updated
+        self._sync_dirty.add(("agent", issuer_id))
+        for conn in self._connections.values():
+            if conn.agent_id == issuer_id:
+                self._sync_dirty.add(("connection", conn.connection_id))
 
     def _add_connection(self, connection_type: str, agent_id: str, **params) -> str:
         """
@@ -311,6 +691,7 @@ class IndyService(ServiceBase):
         conns = self._connections.copy()
         conns[cfg.connection_id] = cfg
         self._connections = conns
+        self._sync_dirty.add(("connection", cfg.connection_id))
         return cfg.connection_id
 
     def _get_connection_status(self, connection_id: str) -> ServiceResponse:
@@ -356,74 +737,532 @@ class IndyService(ServiceBase):
             msg = messages.IndyServiceFail("Unregistered wallet: {}".format(wallet_id))
         return msg
 
-    async def _sync_agent(self, agent: AgentCfg) -> bool:
+    def _use_agent(self, agent: AgentCfg) -> _AgentLease:
+        """
+        Obtain a context manager which opens an agent on first use, and prevents
+        it from being closed while in use
+
+        Args:
+            agent: the created agent configuration
+        """
+        return _AgentLease(self, agent)
+
+    async def _open_agent(self, agent: AgentCfg) -> None:
+        """
+        Open an agent instance if it is not already open, waiting for the agent
+        to be reopened if it is being closed
+        """
+        if not agent.opened or agent.closing:
+            lock = self._agent_locks.get(agent.agent_id)
+            if not lock:
+                lock = self._agent_locks[agent.agent_id] = asyncio.Lock()
+            async with lock:
+                if not agent.opened:
+                    LOGGER.info("Opening agent: %s", agent.agent_id)
+                    await agent.open()
+                    # the DID of a lazily opened agent is only known once it is open
+                    if agent.did:
+                        self._agents_by_did[agent.did] = agent
+                    if self._agent_max_open > 0:
+                        self.run_task(self._close_idle_agents())
+        agent.last_used = time.time()
+
+    async def _close_agent(self, agent: AgentCfg) -> bool:
+        """
+        Close an agent instance and its wallet, unless the agent is in use
+
+        Returns:
+            True if the agent was closed
+        """
+        lock = self._agent_locks.get(agent.agent_id)
+        if not lock:
+            lock = self._agent_locks[agent.agent_id] = asyncio.Lock()
+        async with lock:
+            if not agent.opened or agent.leases:
+                return False
+            shared = any(
+                other is not agent and other.opened and other.wallet_id == agent.wallet_id
+                for other in self._agents.values())
+            if shared:
+                return False
+            LOGGER.info("Closing idle agent: %s", agent.agent_id)
+            # new leases wait for the lock until the agent is closed
+            agent.closing = True
+            try:
+                await agent.close()
+            finally:
+                agent.closing = False
+        return True
+
+    async def _close_idle_agents(self) -> int:
+        """
+        Close the agents which have not been used within the idle timeout, and the
+        least recently used agents beyond the maximum number of open agents
+
+        Returns:
+            the number of agents closed
+        """
+        now = time.time()
+        closed = 0
+        idle = sorted(
+            (agent for agent in self._agents.values() if agent.opened and not agent.leases),
+            key=lambda agent: agent.last_used or 0)
+        excess = 0
+        if self._agent_max_open > 0:
+            excess = sum(1 for agent in self._agents.values() if agent.opened) \
+                - self._agent_max_open
+        for agent in idle:
+            expired = self._agent_idle_timeout > 0 and \
+                now - (agent.last_used or 0) > self._agent_idle_timeout
+            if (expired or excess > 0) and await self._close_agent(agent):
+                closed += 1
+                excess -= 1
+        return closed
+
+    async def _reap_agents(self) -> None:
+        """
+        Periodically close idle agents
+        """
+        #pylint: disable=broad-except
+        if self._agent_idle_timeout > 0:
+            interval = min(max(self._agent_idle_timeout / 2, 1), 60)
+        else:
+            interval = 10
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._close_idle_agents()
+            except Exception:
+                LOGGER.exception("Error closing idle agents")
+
+    def _apply_registration(self, request: ServiceRequest) -> ServiceResponse:
+        """
+        Register a wallet, agent, credential type, connection or proof spec
+
+        Args:
+            request: the registration request
+        Returns:
+            the status of the registered item
+        """
+        if isinstance(request, messages.RegisterWalletReq):
+            wallet_id = self._add_wallet(**request.config)
+            return self._get_wallet_status(wallet_id)
+        if isinstance(request, messages.RegisterAgentReq):
+            agent_id = self._add_agent(request.agent_type, request.wallet_id, **request.config)
+            return self._get_agent_status(agent_id)
+        if isinstance(request, messages.RegisterCredentialTypeReq):
+            self._add_credential_type(
+                request.issuer_id,
+                request.schema_name,
+                request.schema_version,
+                request.origin_did,
+                request.attr_names,
+                request.dependencies,
+                request.config)
+            return messages.IndyServiceAck()
+        if isinstance(request, messages.RegisterConnectionReq):
+            connection_id = self._add_connection(
+                request.connection_type, request.agent_id, **request.config)
+            return self._get_connection_status(connection_id)
+        if isinstance(request, messages.RegisterProofSpecReq):
+            spec_id = self._add_proof_spec(**request.config)
+            return self._get_proof_spec_status(spec_id)
+        if isinstance(request, messages.RemoveWalletReq):
+            self._remove_wallet(request.wallet_id)
+            return messages.IndyServiceAck()
+        if isinstance(request, messages.RemoveAgentReq):
+            self._remove_agent(request.agent_id)
+            return messages.IndyServiceAck()
+        if isinstance(request, messages.RemoveCredentialTypeReq):
+            self._remove_credential_type(
+                request.issuer_id, request.schema_name,
+                request.schema_version, request.origin_did)
+            return messages.IndyServiceAck()
+        if isinstance(request, messages.RemoveConnectionReq):
+            self._remove_connection(request.connection_id)
+            return messages.IndyServiceAck()
+        if isinstance(request, messages.RemoveProofSpecReq):
+            self._remove_proof_spec(request.spec_id)
+            return messages.IndyServiceAck()
+        raise IndyConfigError("Unsupported registration request: {}".format(
+            request.__class__.__name__))
+
+    def _remove_wallet(self, wallet_id: str) -> None:
+        """
+        Remove a wallet configuration. The wallet is closed before the next sync
+
+        Args:
+            wallet_id: the identifier of the registered wallet
+        """
+        if wallet_id not in self._wallets:
+            raise IndyConfigError("Wallet ID not registered: {}".format(wallet_id))
+        for agent in self._agents.values():
+            if agent.wallet_id == wallet_id:
+                raise IndyConfigError("Wallet is in use by agent: {}".format(agent.agent_id))
+        wallets = self._wallets.copy()
+        self._closing.append(wallets.pop(wallet_id))
+        self._wallets = wallets
+
+    def _remove_agent(self, agent_id: str) -> None:
+        """
+        Remove an agent configuration. The agent is closed before the next sync
+
+        Args:
+            agent_id: the identifier of the registered agent
+        """
+        if agent_id not in self._agents:
+            raise IndyConfigError("Agent ID not registered: {}".format(agent_id))
+        for conn in self._connections.values():
+            if conn.agent_id == agent_id:
+                raise IndyConfigError(
+                    "Agent is in use by connection: {}".format(conn.connection_id))
+        agents = self._agents.copy()
+        agent = agents.pop(agent_id)
+        self._agents = agents
+        if agent.did and self._agents_by_did.get(agent.did) is agent:
+            del self._agents_by_did[agent.did]
+        for agent_ids in self._agents_by_schema.values():
+            if agent_id in agent_ids:
+                agent_ids.remove(agent_id)
+        self._sync_dirty.discard(("agent", agent_id))
+        self._closing.append(agent)
+
+    def _remove_credential_type(self, issuer_id: str, schema_name: str,
+                                schema_version: str, origin_did: str) -> None:
+        """
+        Remove a credential type from an issuer. The issuer's connections are
+        synchronized again to update the registered credential types
+
+        Args:
+            issuer_id: the identifier of the issuer service
+            schema_name: the name of the schema used by the credential type
+            schema_version: the version of the schema used by the credential type
+            origin_did: the DID of the service issuing the schema (optional)
+        """
+        agent = self._agents.get(issuer_id)
+        if not agent:
+            raise IndyConfigError("Agent ID not registered: {}".format(issuer_id))
+        found = None
+        for cred_type in agent.cred_types:
+            defn = cred_type["definition"]
+            if defn.name == schema_name and defn.version == schema_version \
+                    and defn.origin_did == origin_did:
+                found = cred_type
+                break
+        if not found:
+            raise IndyConfigError("Credential type not registered: {} {}".format(
+                schema_name, schema_version))
+        agent.cred_types = [cred_type for cred_type in agent.cred_types
+                            if cred_type is not found]
+        agent.reindex_credential_types()
+        agent_ids = self._agents_by_schema.get(schema_name)
+        if agent_ids and issuer_id in agent_ids and \
+                schema_name not in agent.credential_type_names:
+            agent_ids.remove(issuer_id)
+        for conn in self._connections.values():
+            if conn.agent_id == issuer_id:
+                self._sync_dirty.add(("connection", conn.connection_id))
+
+    def _remove_connection(self, connection_id: str) -> None:
+        """
+        Remove a connection configuration. The connection is closed before the next sync
+
+        Args:
+            connection_id: the identifier of the registered connection
+        """
+        if connection_id not in self._connections:
+            raise IndyConfigError("Connection ID not registered: {}".format(connection_id))
+        conns = self._connections.copy()
+        self._closing.append(conns.pop(connection_id))
+        self._connections = conns
+        self._sync_dirty.discard(("connection", connection_id))
+
+    def _remove_proof_spec(self, spec_id: str) -> None:
+        """
+        Remove a proof request specification
+
+        Args:
+            spec_id: the identifier of the registered proof spec
+        """
+        if spec_id not in self._proof_specs:
+            raise IndyConfigError("Proof spec ID not registered: {}".format(spec_id))
+        del self._proof_specs[spec_id]
+        self._sync_dirty.discard(("proof_spec", spec_id))
+
+    async def _close_removed(self) -> None:
+        """
+        Close the connections, agents and wallets which have been removed, in the
+        order they were removed
+        """
+        #pylint: disable=broad-except
+        closing = self._closing
+        self._closing = []
+        for item in closing:
+            try:
+                if isinstance(item, AgentCfg):
+                    # closing the agent would also close a wallet which is still in use
+                    if any(agent.wallet_id == item.wallet_id for agent in self._agents.values()):
+                        continue
+                    if item.leases:
+                        # still in use by a request, try again on the next sync
+                        self._closing.append(item)
+                        continue
+                    if item.agent_id in self._agent_locks and item.agent_id not in self._agents:
+                        del self._agent_locks[item.agent_id]
+                await item.close()
+            except Exception:
+                LOGGER.exception("Error closing removed configuration")
+
+    def _register_config(self, requests: Sequence[ServiceRequest]) -> ServiceResponse:
+        """
+        Apply a set of registrations in order. If any registration fails then the
+        previous configuration is restored
+
+        Args:
+            requests: the registration requests
+        """
+        saved = (
+            self._wallets, self._agents, self._connections, dict(self._proof_specs),
+            {key: list(ids) for key, ids in self._agents_by_schema.items()},
+            set(self._sync_dirty), list(self._closing), dict(self._agents_by_did),
+            {agent_id: list(agent.cred_types) for agent_id, agent in self._agents.items()},
+        )
+        #pylint: disable=broad-except
+        results = []
+        try:
+            for idx, request in enumerate(requests):
+                try:
+                    results.append(self._apply_registration(request))
+                except IndyError as e:
+                    raise IndyConfigError("Registration {} failed: {}".format(idx, e)) from None
+                except Exception as e:
+                    # malformed configuration values are reported like other failures
+                    LOGGER.exception("Error applying registration %s:", idx)
+                    raise IndyConfigError("Registration {} failed: {}: {}".format(
+                        idx, e.__class__.__name__, e)) from None
+        except Exception:
+            (self._wallets, self._agents, self._connections, self._proof_specs,
+             self._agents_by_schema, self._sync_dirty, self._closing, self._agents_by_did,
+             cred_types) = saved
+            for agent_id, types in cred_types.items():
+                # replaced credential types leave the number of types unchanged
+                agent = self._agents[agent_id]
+                agent.cred_types = types
+                agent.reindex_credential_types()
+            raise
+        LOGGER.info("Registered %s configuration items", len(results))
+        return messages.RegisterConfig(results)
+
+    async def _sync_agent(self, agent: AgentCfg, force: bool = False) -> bool:
         """
         Perform agent synchronization, registering the DID and publishing schemas
         and credential definitions as required
 
         Args:
             agent: the Indy agent configuration
+            force: whether to repeat the synchronization if already performed
         """
         LOGGER.debug('Checking if agent synced...')
-        if not agent.synced:
+        if force or not agent.synced:
             LOGGER.debug('Syncing agent...')
             if not agent.created:
                 LOGGER.debug('Creating agent...')
                 wallet = self._wallets[agent.wallet_id]
                 if not wallet.created:
                     return False
-                await agent.create(wallet, self._pool)
-
-            LOGGER.debug('Opening agent...')
-            await agent.open()
-
-            LOGGER.debug('Checking if agent is registered...')
-            if not agent.registered:
-                # check DID is registered
-                LOGGER.debug('Registering agent...')
-                auto_register = self._config.get("auto_register", True)
-                await self._check_registration(agent, auto_register, agent.role)
-
-                # check endpoint is registered (if any)
-                LOGGER.debug('Checking agent endpoint...')
-                await self._check_endpoint(agent)
-                agent.registered = True
-
-            # publish schemas
-            for cred_type in agent.cred_types:
-                LOGGER.debug('Publishing agent schemas...')
-                await self._publish_schema(agent, cred_type)
+                async with self._sync_limit:
+                    await agent.create(wallet, self._pool, self._agent_lazy)
+                if agent.did:
+                    self._agents_by_did[agent.did] = agent
+
+            if not agent.registered and self._restore_agent(agent):
+                LOGGER.info("Restored agent state from sync snapshot: %s", agent.agent_id)
+
+            pending = [
+                cred_type for cred_type in agent.cred_types
+                if not cred_type.get("ledger_schema") or not cred_type.get("cred_def")]
+            if not self._agent_lazy or not agent.registered or pending:
+                async with self._use_agent(agent):
+                    if not agent.registered:
+                        async with self._sync_limit:
+                            # check DID is registered
+                            LOGGER.debug('Registering agent...')
+                            auto_register = self._config.get("auto_register", True)
+                            await self._check_registration(agent, auto_register, agent.role)
+
+                            # check endpoint is registered (if any)
+                            LOGGER.debug('Checking agent endpoint...')
+                            await self._check_endpoint(agent)
+                            agent.registered = True
+
+                    # publish schemas
+                    LOGGER.debug('Publishing agent schemas...')
+                    await self._gather_sync(*(
+                        self._sync_task(self._publish_schema(agent, cred_type))
+                        for cred_type in pending))
 
             agent.synced = True
             LOGGER.info("Indy agent synced: %s", agent.agent_id)
         return agent.synced
 
-    async def _sync_connection(self, connection: ConnectionCfg) -> bool:
+    async def _sync_connection(self, connection: ConnectionCfg, force: bool = False) -> bool:
         """
         Perform synchronization on a connection object
+
+        Args:
+            connection: the connection configuration
+            force: whether to repeat the synchronization if already performed
         """
         agent = self._agents[connection.agent_id]
 
-        if not connection.synced:
-            if not connection.created:
+        if force or not connection.synced:
+            if force or not connection.created:
                 if not agent.synced:
                     return False
                 agent_cfg = agent.get_connection_params(connection)
                 if not agent_cfg:
                     agent_cfg = {}
                 agent_cfg["config_root"] = self._env.get("CONFIG_ROOT")
-                await connection.create(agent_cfg)
+                if connection.created:
+                    # pick up any credential types added since the connection was created
+                    connection.instance.agent_params = agent_cfg
+                else:
+                    await connection.create(agent_cfg)
 
             try:
                 if not connection.opened:
                     await connection.open(self)
 
-                await connection.sync()
+                if force or not self._restore_connection(connection):
+                    await connection.sync(force)
+                    if self._snapshot:
+                        self._snapshot.connections[connection.connection_id] = \
+                            self._connection_sync_hash(connection)
             except IndyConnectionError as e:
                 raise ServiceSyncError("Error syncing connection {}: {}".format(
                     connection.connection_id, str(e))) from None
         return connection.synced
 
+    def _restore_agent(self, agent: AgentCfg) -> bool:
+        """
+        Mark an agent as registered, and restore its published schemas and credential
+        definitions, when they were recorded in the sync snapshot for the same DID
+        and endpoint. The restored state is checked in the background
+
+        Args:
+            agent: the created agent configuration
+        """
+        state = self._snapshot and self._snapshot.agents.get(agent.agent_id)
+        if not state or state.get("did") != agent.did \
+                or state.get("endpoint") != agent.endpoint:
+            return False
+        cred_types = state.get("cred_types") or {}
+        for cred_type in agent.cred_types:
+            defn = cred_type["definition"]
+            found = cred_types.get(_cred_type_key(defn))
+            if found and not cred_type.get("ledger_schema") and \
+                    sorted(found["schema"]["attrNames"]) == sorted(defn.attr_names):
+                cred_type["ledger_schema"] = found["schema"]
+                cred_type["cred_def"] = found["cred_def"]
+        agent.registered = True
+        self._snapshot_unverified.add(("agent", agent.agent_id))
+        return True
+
+    def _restore_connection(self, connection: ConnectionCfg) -> bool:
+        """
+        Mark a connection as synced when the same registration was recorded in the
+        sync snapshot. The registration is repeated in the background
+
+        Args:
+            connection: the opened connection configuration
+        """
+        if not self._snapshot:
+            return False
+        recorded = self._snapshot.connections.get(connection.connection_id)
+        if not recorded or recorded != self._connection_sync_hash(connection):
+            return False
+        connection.synced = True
+        self._snapshot_unverified.add(("connection", connection.connection_id))
+        return True
+
+    def _connection_sync_hash(self, connection: ConnectionCfg) -> str:
+        """
+        Calculate a hash of the registration submitted when syncing a connection
+        """
+        spec = connection.instance.sync_spec()
+        return hashlib.sha256(
+            json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _save_snapshot(self) -> None:
+        """
+        Record the verified state of the synced agents in the sync snapshot
+        """
+        for agent in self._agents.values():
+            if not agent.synced or ("agent", agent.agent_id) in self._snapshot_unverified:
+                continue
+            self._snapshot.agents[agent.agent_id] = {
+                "did": agent.did,
+                "endpoint": agent.endpoint,
+                "cred_types": {
+                    _cred_type_key(cred_type["definition"]): {
+                        "schema": cred_type["ledger_schema"],
+                        "cred_def": cred_type["cred_def"],
+                    }
+                    for cred_type in agent.cred_types
+                    if cred_type.get("ledger_schema") and cred_type.get("cred_def")
+                },
+            }
+        self._snapshot.save()
+        self._update_status(snapshot_unverified=len(self._snapshot_unverified))
+
+    async def _revalidate_snapshot(self) -> None:
+        """
+        Check the agent and connection state restored from the sync snapshot
+        against the ledger and the connection targets
+        """
+        #pylint: disable=broad-except
+        async with self._sync_lock:
+            pending = self._snapshot_unverified
+            if not pending or not self._status["started"]:
+                return
+            self._snapshot_unverified = set()
+            try:
+                auto_register = self._config.get("auto_register", True)
+                for kind, item_id in sorted(pending):
+                    if kind == "agent" and item_id in self._agents:
+                        agent = self._agents[item_id]
+                        async with self._use_agent(agent):
+                            await self._check_registration(agent, auto_register, agent.role)
+                            await self._check_endpoint(agent)
+                            for cred_type in agent.cred_types:
+                                await self._revalidate_cred_type(agent, cred_type)
+                for kind, item_id in sorted(pending):
+                    if kind == "connection" and item_id in self._connections:
+                        await self._sync_connection(self._connections[item_id], True)
+            except Exception:
+                LOGGER.exception("Error revalidating sync snapshot")
+                self._snapshot_unverified.update(pending)
+                return
+            self._save_snapshot()
+            LOGGER.info("Revalidated sync snapshot: %s", self._snapshot.path)
+
+    async def _revalidate_cred_type(self, agent: AgentCfg, cred_type: dict) -> None:
+        """
+        Look up the schema and credential definition of a restored credential type,
+        replacing the restored values if they do not match the ledger
+        """
+        check = {"definition": cred_type["definition"]}
+        await self._publish_schema(agent, check)
+        old_schema = cred_type.get("ledger_schema") or {}
+        old_cred_def = cred_type.get("cred_def") or {}
+        if old_schema.get("id") != check["ledger_schema"].get("id") \
+                or old_cred_def.get("id") != check["cred_def"].get("id"):
+            LOGGER.warning("Sync snapshot out of date for credential type: %s",
+                           _cred_type_key(cred_type["definition"]))
+            cred_type["ledger_schema"] = check["ledger_schema"]
+            cred_type["cred_def"] = check["cred_def"]
+            cred_type.pop("cred_request_cache", None)
+
     async def _setup_pool(self) -> None:
         """
         Initialize the Indy NodePool, fetching the genesis transaction if necessary
@@ -437,63 +1276,100 @@ class IndyService(ServiceBase):
             self._pool = NodePool(self._name, self._genesis_path, pool_cfg)
             await self._pool.open()
             self._opened = True
+            ledger_id = None
+            if self._artifacts_path or self._snapshot_path:
+                ledger_id = ledger_id_from_genesis(self._genesis_path)
+            if self._snapshot_path and not self._snapshot:
+                self._snapshot = SyncSnapshot(self._snapshot_path, ledger_id)
+                if self._snapshot.load():
+                    LOGGER.info("Loaded sync snapshot from %s", self._snapshot.path)
+            if self._artifacts_path and not self._artifacts:
+                self._artifacts = LedgerArtifactCache(self._artifacts_path, ledger_id)
+                count = self._artifacts.preload()
+                LOGGER.info("Loaded %s cached ledger artifacts from %s",
+                            count, self._artifacts.path)
+            if self._verifier_workers > 0 and not self._verifier_pool:
+                self._verifier_pool = VerifierPool(self._verifier_workers, {
+                    "name": self._name,
+                    "genesis_path": str(self._genesis_path),
+                    "pool_cfg": pool_cfg,
+                    "ledger_cache_path": self._artifacts_path,
+                    "ledger_id": ledger_id,
+                })
+                self._verifier_pool.start()
 
     async def _check_genesis_path(self) -> None:
         """
         Make sure that the genesis path is defined, and download the transaction file if needed.
+        A recent copy of a downloaded file is used immediately and refreshed in the background
         """
         if not self._genesis_path:
             path = self._config.get("genesis_path")
             if not path:
                 raise IndyConfigError("Missing genesis_path")
             genesis_path = pathlib.Path(path)
-            if not genesis_path.exists():
-                genesis_url = self._genesis_url
-                if not genesis_url:
-                    ledger_url = self._ledger_url
-                    if not ledger_url:
-                        raise IndyConfigError(
-                            "Cannot retrieve genesis transaction without ledger_url or genesis_url"
-                        )
-                    genesis_url = "{}/genesis".format(ledger_url)
-                parent_path = pathlib.Path(genesis_path.parent)
-                if not parent_path.exists():
-                    parent_path.mkdir(parents=True)
-                await self._fetch_genesis_txn(genesis_url, genesis_path)
-            elif genesis_path.is_dir():
+            if genesis_path.is_dir():
                 raise IndyConfigError("genesis_path must not point to a directory")
+            genesis_url = self._genesis_url
+            if not genesis_url and self._ledger_url:
+                genesis_url = "{}/genesis".format(self._ledger_url)
+            if genesis_url:
+                if self._genesis_cache_path:
+                    cache = GenesisCache.in_directory(genesis_url, self._genesis_cache_path)
+                else:
+                    cache = GenesisCache(genesis_url, genesis_path)
+                if not genesis_path.exists() or cache.downloaded:
+                    # a file downloaded previously is kept up to date
+                    await self._fetch_genesis_txn(cache, genesis_path)
+            elif not genesis_path.exists():
+                raise IndyConfigError(
+                    "Cannot retrieve genesis transaction without ledger_url or genesis_url"
+                )
             self._genesis_path = path
 
-    async def _fetch_genesis_txn(self, genesis_url: str, target_path: str) -> bool:
+    async def _fetch_genesis_txn(self, cache: GenesisCache, target_path: pathlib.Path) -> None:
         """
-        Download the genesis transaction file from the ledger server
+        Download the genesis transaction file from the ledger server, unless a recent
+        copy is available
 
         Args:
-            genesis_url: the root address of genesis file
+            cache: the downloaded copy of the genesis transaction file
             target_path: the filesystem path of the genesis transaction file once downloaded
         """
-        LOGGER.info(
-            "Fetching genesis transaction file from %s", genesis_url
-        )
+        age = cache.age()
+        if age is None or age > self._genesis_max_age:
+            try:
+                await cache.fetch()
+            except IndyError as e:
+                if age is None:
+                    raise ServiceSyncError(str(e)) from None
+                LOGGER.warning("Using previous genesis transaction file: %s", str(e))
+            age = 0
+        cache.install(target_path)
+        if self._genesis_refresh_interval > 0 and not self._genesis_refresh:
+            self._genesis_refresh = self.run_task(self._refresh_genesis_txn(
+                cache, target_path, max(self._genesis_refresh_interval - age, 0)))
 
-        try:
-            async with HttpSession('fetching genesis transaction', timeout=15) as handler:
-                response = await handler.client.get(genesis_url)
-                await handler.check_status(response, (200,))
-                data = await response.text()
-        except IndyConnectionError as e:
-            raise ServiceSyncError(str(e)) from None
-
-        # check data is valid json
-        LOGGER.debug("Genesis transaction response: %s", data)
-        lines = data.splitlines()
-        if not lines or not json.loads(lines[0]):
-            raise ServiceSyncError("Genesis transaction file is not valid JSON")
-
-        # write result to provided path
-        with target_path.open("x") as output_file:
-            output_file.write(data)
-        return True
+    async def _refresh_genesis_txn(self, cache: GenesisCache, target_path: pathlib.Path,
+                                   delay: float) -> None:
+        """
+        Periodically check the ledger server for an updated genesis transaction file.
+        The new file is used when the node pool is next opened
+
+        Args:
+            cache: the downloaded copy of the genesis transaction file
+            target_path: the filesystem path of the genesis transaction file
+            delay: the number of seconds to wait before the first check
+        """
+        while True:
+            await asyncio.sleep(delay)
+            delay = self._genesis_refresh_interval
+            try:
+                updated = await cache.fetch()
+                if cache.install(target_path) or updated:
+                    LOGGER.info("Updated genesis transaction file: %s", target_path)
+            except (IndyError, OSError) as e:
+                LOGGER.warning("Error refreshing genesis transaction file: %s", str(e))
 
     async def _check_registration(self, agent: AgentCfg, auto_register: bool = True,
                                   role: str = "") -> None:
@@ -573,6 +1449,7 @@ class IndyService(ServiceBase):
 
             try:
                 s_key = schema_key(s_id)
+                await self._restore_artifact(SCHEMA, s_id)
                 schema_json = await issuer.instance.get_schema(s_key)
                 ledger_schema = json.loads(schema_json)
                 log_json("Schema found on ledger:", ledger_schema, LOGGER)
@@ -601,6 +1478,7 @@ class IndyService(ServiceBase):
                     raise ServiceSyncError("Schema was not published to ledger")
                 log_json("Published schema:", ledger_schema, LOGGER)
             cred_type["ledger_schema"] = ledger_schema
+            await self._store_artifact(SCHEMA, ledger_schema.get("id"), ledger_schema)
 
         if not cred_type.get("cred_def"):
             # Check if credential definition has been published
@@ -611,12 +1489,12 @@ class IndyService(ServiceBase):
             )
 
             try:
-                cred_def_json = await issuer.instance.get_cred_def(
-                    cred_def_id(
-                        issuer.did,
-                        cred_type["ledger_schema"]["seqNo"],
-                        self._pool.protocol)
-                )
+                cd_id = cred_def_id(
+                    issuer.did,
+                    cred_type["ledger_schema"]["seqNo"],
+                    self._pool.protocol)
+                await self._restore_artifact(CRED_DEF, cd_id)
+                cred_def_json = await issuer.instance.get_cred_def(cd_id)
                 cred_def = json.loads(cred_def_json)
                 log_json("messages.Credential def found on ledger:", cred_def, LOGGER)
             except AbsentCredDef:
@@ -632,6 +1510,34 @@ class IndyService(ServiceBase):
                 cred_def = json.loads(cred_def_json)
                 log_json("Published credential def:", cred_def, LOGGER)
             cred_type["cred_def"] = cred_def
+            await self._store_artifact(CRED_DEF, cred_def.get("id"), cred_def)
+
+    async def _restore_artifact(self, kind: str, artifact_id: str) -> None:
+        """
+        Add a schema or credential definition stored by this or another process to
+        the von_anchor cache, so that it is not requested from the ledger
+
+        Args:
+            kind: the artifact type, either `schema` or `cred_def`
+            artifact_id: the ledger identifier of the artifact
+        """
+        if self._artifacts and artifact_id and not is_cached(kind, artifact_id):
+            data = await self.run_thread(self._artifacts.get, kind, artifact_id)
+            if data:
+                cache_artifact(kind, data)
+
+    async def _store_artifact(self, kind: str, artifact_id: str, data: dict) -> None:
+        """
+        Add a schema or credential definition retrieved from the ledger to the
+        persistent artifact cache
+
+        Args:
+            kind: the artifact type, either `schema` or `cred_def`
+            artifact_id: the ledger identifier of the artifact
+            data: the artifact retrieved from the ledger
+        """
+        if self._artifacts and artifact_id and not self._artifacts.is_stored(kind, artifact_id):
+            await self.run_thread(self._artifacts.put, kind, artifact_id, data)
 
     async def _issue_credential(self, connection_id: str, schema_name: str,
                                 schema_version: str, origin_did: str,
@@ -663,21 +1569,7 @@ class IndyService(ServiceBase):
             raise IndyConfigError("Could not locate credential type: {}/{} {}".format(
                 schema_name, schema_version, origin_did))
 
-        cred_request_cache = cred_type.get("cred_request_cache")
-        if not cred_request_cache:
-            cred_request_cache = cred_type["cred_request_cache"] = \
-                {"request": None, "lock": asyncio.Lock()}
-        async with cred_request_cache["lock"]:
-            if cred_request_cache["request"] and cred_request_cache["expiry"] > time.time():
-                cred_request = cred_request_cache["request"]
-                LOGGER.debug("Fetched credential request from cache")
-            else:
-                cred_offer = await self._create_cred_offer(issuer, cred_type)
-                log_json("Created cred offer:", cred_offer, LOGGER)
-                cred_request = await conn.instance.generate_credential_request(cred_offer)
-                cred_request_cache["request"] = cred_request
-                cred_request_cache["expiry"] = time.time() + 600
-                LOGGER.debug("Saved cred request cache")
+        cred_request = await self._get_cred_request(issuer, conn, cred_type)
         log_json("Got cred request:", cred_request, LOGGER)
 
         async def make_cred(cred_data):
@@ -687,11 +1579,14 @@ class IndyService(ServiceBase):
             return cred
 
         if batch:
-            creds = []
-            for data in cred_data:
-                creds.append(asyncio.ensure_future(make_cred(data)))
-            creds = await asyncio.gather(*creds)
-            stored = await conn.instance.store_credential_batch(creds)
+            # a credential which cannot be created only fails its own position
+            creds = await asyncio.gather(
+                *(make_cred(data) for data in cred_data), return_exceptions=True)
+            created = [cred for cred in creds if not isinstance(cred, Exception)]
+            stored = await conn.instance.store_credential_batch(created) \
+                if created else messages.StoredCredentialBatch([], [])
+            if len(created) < len(creds):
+                stored = _merge_failed_creds(stored, creds)
             log_json("Stored credentials:", stored, LOGGER)
         else:
             cred = await make_cred(cred_data)
@@ -700,6 +1595,244 @@ class IndyService(ServiceBase):
 
         return stored
 
+    async def _get_cred_request(self, issuer: AgentCfg, conn: ConnectionCfg, cred_type: dict,
+                                refresh: bool = False) -> messages.CredentialRequest:
+        """
+        Fetch the cached credential request for a connection and credential type, creating
+        a new credential offer and request if necessary. Requests close to expiry are
+        replaced in the background while the cached request continues to be used
+
+        Args:
+            issuer: the issuer agent configuration
+            conn: the connection to the holder
+            cred_type: the credential type definition
+            refresh: always replace the cached request
+        """
+        cache = cred_type.get("cred_request_cache")
+        if cache is None:
+            cache = cred_type["cred_request_cache"] = {}
+        entry = cache.get(conn.connection_id)
+        if not entry:
+            entry = cache[conn.connection_id] = \
+                {"request": None, "expiry": 0, "lock": asyncio.Lock(), "refreshing": False}
+        if not refresh and entry["request"]:
+            remain = entry["expiry"] - time.time()
+            if remain > 0:
+                if remain < self._cred_request_ttl / 5 and not entry["refreshing"]:
+                    entry["refreshing"] = True
+                    self.run_task(self._refresh_cred_request(issuer, conn, cred_type, entry))
+                LOGGER.debug("Fetched credential request from cache")
+                return entry["request"]
+        async with entry["lock"]:
+            if not refresh and entry["request"] and entry["expiry"] > time.time():
+                return entry["request"]
+            cred_offer = await self._create_cred_offer(issuer, cred_type)
+            log_json("Created cred offer:", cred_offer, LOGGER)
+            cred_request = await conn.instance.generate_credential_request(cred_offer)
+            entry["request"] = cred_request
+            entry["expiry"] = time.time() + self._cred_request_ttl
+            LOGGER.debug("Saved cred request cache")
+        return cred_request
+
+    async def _refresh_cred_request(self, issuer: AgentCfg, conn: ConnectionCfg,
+                                    cred_type: dict, entry: dict) -> None:
+        """
+        Replace a cached credential request which is close to expiry
+        """
+        #pylint: disable=broad-except
+        try:
+            await self._get_cred_request(issuer, conn, cred_type, True)
+        except Exception:
+            LOGGER.exception("Error refreshing credential request for %s:", conn.connection_id)
+        finally:
+            entry["refreshing"] = False
+
+    async def _issue_credential_once(self, idempotency_key: str, connection_id: str,
+                                     schema_name: str, schema_version: str,
+                                     origin_did: str, cred_data,
+                                     batch: bool = False) -> ServiceResponse:
+        """
+        Issue a credential or batch of credentials unless the same idempotency key has
+        already been used for this connection and credential type. Duplicate requests
+        received while the first is in progress wait for its result, and completed
+        results are retained for a limited time instead of being issued again.
+        Reusing the key with different credential data is reported as a conflict
+
+        Args:
+            idempotency_key: the unique key provided by the client, if any
+            connection_id: the identifier of the registered connection
+            schema_name: the name of the credential schema
+            schema_version: the version of the credential schema
+            origin_did: the origin DID of the ledger schema (may be None)
+            cred_data: the raw credential attributes, or a list for a batch
+            batch: whether to issue a batch of credentials
+        """
+        issue = self._issue_credential if batch else self._issue_single_credential
+        if not idempotency_key or not self._idempotency_ttl:
+            return await issue(
+                connection_id, schema_name, schema_version, origin_did, cred_data, batch)
+        key = (connection_id, schema_name, schema_version, origin_did, batch, idempotency_key)
+        digest = _request_digest(cred_data)
+        if key in self._issue_results:
+            LOGGER.info("Returning previous result for idempotency key: %s", idempotency_key)
+
+        async def load():
+            return digest, await issue(
+                connection_id, schema_name, schema_version, origin_did, cred_data, batch)
+
+        found_digest, result = await self._issue_results.get_or_load(
+            key, load, _issue_result_ttl)
+        if found_digest != digest:
+            return _idempotency_conflict(idempotency_key)
+        return result
+
+    async def _issue_single_credential(self, connection_id: str, schema_name: str,
+                                       schema_version: str, origin_did: str,
+                                       cred_data: Mapping,
+                                       _batch: bool = False) -> ServiceResponse:
+        """
+        Issue a single credential, combining it with concurrent requests for the same
+        connection and credential type when coalescing is enabled
+
+        Args:
+            connection_id: the identifier of the registered connection
+            schema_name: the name of the credential schema
+            schema_version: the version of the credential schema
+            origin_did: the origin DID of the ledger schema (may be None)
+            cred_data: the raw credential attributes
+        """
+        if not self._issue_coalescer:
+            return await self._issue_credential(
+                connection_id, schema_name, schema_version, origin_did, cred_data)
+        return await self._issue_coalescer.submit(
+            (connection_id, schema_name, schema_version, origin_did), cred_data)
+
+    async def _issue_credential_group(self, key: tuple, cred_data: Sequence) -> list:
+        """
+        Issue a batch of coalesced single credential requests
+
+        Args:
+            key: the connection ID, schema name, schema version and origin DID
+            cred_data: the list of raw credential attributes
+        Returns:
+            a list of stored credentials or exceptions in the original order
+        """
+        connection_id, schema_name, schema_version, origin_did = key
+        with self._timer("issue_credential_coalesced"):
+            batch = await self._issue_credential(
+                connection_id, schema_name, schema_version, origin_did, cred_data, True)
+        results = []
+        erridx = 0
+        for stored in batch.results:
+            if stored.cred_id:
+                results.append(stored)
+            else:
+                errmsg = batch.errors[erridx] \
+                    if batch.errors and erridx < len(batch.errors) else None
+                erridx += 1
+                results.append(IndyConnectionError(errmsg or "Credential was not stored"))
+        return results
+
+    def _start_issue_job(self, connection_id: str,
+                         credentials: Sequence) -> messages.IssueCredentialJobStatus:
+        """
+        Begin issuing a list of credentials in the background
+
+        Args:
+            connection_id: the identifier of the registered connection
+            credentials: a list of dicts defining the schema_name, schema_version,
+                origin_did and attributes of each credential
+        """
+        if connection_id not in self._connections:
+            raise IndyConfigError("Unknown connection id: {}".format(connection_id))
+        job = IssueCredentialJob(_make_id("job-", 16), connection_id, credentials)
+        groups = job.group_credentials()
+        self._issue_jobs[job.job_id] = job
+        self.run_task(self._run_issue_job(job, groups))
+        LOGGER.info("Started issuance job %s for %s credentials", job.job_id, job.total)
+        return messages.IssueCredentialJobStatus(job.job_id, job.get_status(False))
+
+    def _start_issue_job_once(self, idempotency_key: str, connection_id: str,
+                              credentials: Sequence) -> messages.IssueCredentialJobStatus:
+        """
+        Begin issuing a list of credentials in the background unless a job has already
+        been started with the same idempotency key for this connection, in which case
+        the status of the existing job is returned. Reusing the key with different
+        credentials is reported as a conflict
+
+        Args:
+            idempotency_key: the unique key provided by the client, if any
+            connection_id: the identifier of the registered connection
+            credentials: a list of dicts defining the schema_name, schema_version,
+                origin_did and attributes of each credential
+        """
+        if not idempotency_key or not self._idempotency_ttl:
+            return self._start_issue_job(connection_id, credentials)
+        key = (connection_id, None, None, None, "job", idempotency_key)
+        digest = _request_digest(credentials)
+        found = self._issue_results.get(key)
+        if found:
+            found_digest, started = found
+            if found_digest != digest:
+                return _idempotency_conflict(idempotency_key)
+            LOGGER.info("Returning existing job for idempotency key: %s", idempotency_key)
+            job = self._issue_jobs.get(started.job_id) or \
+                self._issue_job_results.get(started.job_id)
+            if job:
+                return messages.IssueCredentialJobStatus(job.job_id, job.get_status(False))
+            return started
+        started = self._start_issue_job(connection_id, credentials)
+        self._issue_results.set(key, (digest, started))
+        return started
+
+    async def _run_issue_job(self, job: IssueCredentialJob, groups: Mapping) -> None:
+        """
+        Issue the credentials requested by a job in batches, recording the progress
+
+        Args:
+            job: the issuance job
+            groups: the credentials grouped by credential type
+        """
+        #pylint: disable=broad-except
+        job.start()
+        size = max(self._issue_job_chunk_size, 1)
+        for (schema_name, schema_version, origin_did), rows in groups.items():
+            for pos in range(0, len(rows), size):
+                chunk = rows[pos:pos + size]
+                positions = [row[0] for row in chunk]
+                try:
+                    with self._timer("issue_credential_job"):
+                        batch = await self._issue_credential(
+                            job.connection_id, schema_name, schema_version, origin_did,
+                            [row[1] for row in chunk], True)
+                    job.set_batch_results(positions, batch)
+                except IndyError as e:
+                    for idx in positions:
+                        job.set_result(idx, False, str(e))
+                except Exception:
+                    LOGGER.exception("Exception during issuance job %s:", job.job_id)
+                    for idx in positions:
+                        job.set_result(idx, False, "Exception during credential issuance")
+        job.finish()
+        del self._issue_jobs[job.job_id]
+        self._issue_job_results.set(job.job_id, job)
+        LOGGER.info("Finished issuance job %s: %s of %s failed",
+                    job.job_id, job.failed, job.total)
+
+    def _get_issue_job_status(self, job_id: str) -> ServiceResponse:
+        """
+        Return the status of a running or recently completed issuance job
+
+        Args:
+            job_id: the unique identifier of the job
+        """
+        job = self._issue_jobs.get(job_id) or self._issue_job_results.get(job_id)
+        if job:
+            msg = messages.IssueCredentialJobStatus(job_id, job.get_status())
+        else:
+            msg = messages.IndyServiceFail("Unknown issuance job: {}".format(job_id))
+        return msg
+
     def _fix_cred_data(self, schema, cred_data: dict):
         """
         Provide empty values for any missing schema attributes and remove unknown
@@ -730,9 +1863,10 @@ class IndyService(ServiceBase):
             issuer.agent_id,
             schema.name,
         )
-        cred_offer_json = await issuer.instance.create_cred_offer(
-            cred_type["ledger_schema"]["seqNo"]
-        )
+        async with self._use_agent(issuer):
+            cred_offer_json = await issuer.instance.create_cred_offer(
+                cred_type["ledger_schema"]["seqNo"]
+            )
         return messages.CredentialOffer(
             json.loads(cred_offer_json),
             cred_type["cred_def"]["id"],
@@ -748,7 +1882,7 @@ class IndyService(ServiceBase):
             request: a credential request returned from the holder service
             cred_data: the raw credential attributes
         """
-        async with self._storage_lock:
+        async with self._storage_lock, self._use_agent(issuer):
             (cred_json, cred_revoc_id, _epoch_creation) = await issuer.instance.create_cred(
                 json.dumps(request.cred_offer.data),
                 request.data,
@@ -774,9 +1908,9 @@ class IndyService(ServiceBase):
             raise IndyConfigError(
                 "Cannot generate credential request from non-holder agent: {}".format(
                     holder.agent_id))
-        async with self._storage_lock:
-            if not holder.synced:
-                raise IndyConfigError("Holder is not yet synchronized: {}".format(holder_id))
+        if not holder.synced:
+            raise IndyConfigError("Holder is not yet synchronized: {}".format(holder_id))
+        async with self._storage_lock, self._use_agent(holder):
             (cred_req, req_metadata_json) = await holder.instance.create_cred_req(
                 json.dumps(cred_offer.data),
                 cred_offer.cred_def_id,
@@ -799,13 +1933,16 @@ class IndyService(ServiceBase):
         if not holder.is_holder:
             raise IndyConfigError(
                 "Cannot store credential using non-holder agent: {}".format(holder.agent_id))
-        async with self._storage_lock:
-            if not holder.synced:
-                raise IndyConfigError("Holder is not yet synchronized: {}".format(holder_id))
+        if not holder.synced:
+            raise IndyConfigError("Holder is not yet synchronized: {}".format(holder_id))
+        async with self._storage_lock, self._use_agent(holder):
             cred_id = await holder.instance.store_cred(
                 json.dumps(credential.cred_data),
                 json.dumps(credential.cred_req_metadata),
             )
+        cache = self._cred_info_caches.get(holder_id)
+        if cache:
+            cache.clear()
         return messages.StoredCredential(
             credential,
             cred_id,
@@ -816,9 +1953,9 @@ class IndyService(ServiceBase):
         """
         Resolve a schema defined by one of our issuers
         """
-        lookup_agent = None
-        for agent_id, agent in self._agents.items():
-            if agent.synced:
+        for agent_id in self._agents_by_schema.get(schema_name, ()):
+            agent = self._agents.get(agent_id)
+            if agent and agent.synced:
                 found = agent.find_credential_type(schema_name, schema_version, origin_did)
                 if found:
                     defn = found["definition"]
@@ -831,26 +1968,93 @@ class IndyService(ServiceBase):
                         did,
                         defn.attr_names,
                     )
-                lookup_agent = agent
-        if schema_name and schema_version and origin_did and lookup_agent:
-            s_id = schema_id(origin_did, schema_name, schema_version)
-            s_key = schema_key(s_id)
-            try:
-                schema_json = await lookup_agent.instance.get_schema(s_key)
-                ledger_schema = json.loads(schema_json)
-                log_json("Schema found on ledger:", ledger_schema, LOGGER)
-                return messages.ResolvedSchema(
-                    None,
-                    s_id,
-                    schema_name,
-                    schema_version,
-                    origin_did,
-                    ledger_schema["attrNames"],
-                )
-            except AbsentSchema:
-                pass
+        lookup_agent = None
+        if schema_name and schema_version and origin_did:
+            lookup_agent = self._agents_by_did.get(origin_did)
+            if not lookup_agent or not lookup_agent.synced:
+                lookup_agent = next(
+                    (agent for agent in self._agents.values() if agent.synced), None)
+        if lookup_agent:
+            found = await self._schema_cache.get_or_load(
+                (origin_did, schema_name, schema_version),
+                lambda: self._fetch_ledger_schema(
+                    lookup_agent, schema_name, schema_version, origin_did),
+                lambda found: None if found else self._schema_negative_ttl)
+            if found:
+                return found
         raise IndyConfigError("Issuer schema not found: {}/{}".format(schema_name, schema_version))
 
+    async def _fetch_ledger_schema(self, lookup_agent: AgentCfg, schema_name: str,
+                                   schema_version: str,
+                                   origin_did: str) -> messages.ResolvedSchema:
+        """
+        Look up a schema published by another issuer on the ledger
+
+        Returns:
+            the resolved schema, or None if it is not found
+        """
+        s_id = schema_id(origin_did, schema_name, schema_version)
+        s_key = schema_key(s_id)
+        await self._restore_artifact(SCHEMA, s_id)
+        try:
+            async with self._use_agent(lookup_agent):
+                schema_json = await lookup_agent.instance.get_schema(s_key)
+        except AbsentSchema:
+            return None
+        ledger_schema = json.loads(schema_json)
+        log_json("Schema found on ledger:", ledger_schema, LOGGER)
+        await self._store_artifact(SCHEMA, s_id, ledger_schema)
+        return messages.ResolvedSchema(
+            None,
+            s_id,
+            schema_name,
+            schema_version,
+            origin_did,
+            ledger_schema["attrNames"],
+        )
+
+    def _invalidate_schema_cache(self, schema_name: str = None, schema_version: str = None,
+                                 origin_did: str = None) -> None:
+        """
+        Remove a resolved schema from the cache, or all schemas if none is specified
+        """
+        if schema_name:
+            self._schema_cache.remove((origin_did, schema_name, schema_version))
+        else:
+            self._schema_cache.clear()
+
+    async def _get_creds_info(self, holder: AgentCfg, cred_ids: Sequence) -> list:
+        """
+        Look up the details of a set of credentials in a holder's wallet. Lookups are
+        performed concurrently and recent results are cached until a new credential
+        is stored. Credentials which are not found are skipped
+
+        Args:
+            holder: the holder agent configuration
+            cred_ids: the credential identifiers
+        """
+        cache = self._cred_info_caches.get(holder.agent_id)
+        if not cache:
+            cache = self._cred_info_caches[holder.agent_id] = TTLCache(
+                int(self._env.get("CRED_INFO_CACHE_SIZE", 1000)),
+                int(self._env.get("CRED_INFO_CACHE_TTL", 30)))
+            self._add_cache("cred_info:" + holder.agent_id, cache)
+
+        async def load(cred_id):
+            async with self._cred_lookup_lock, self._use_agent(holder):
+                found_cred_json = await holder.instance.get_cred_info_by_id(cred_id)
+            return json.loads(found_cred_json)
+
+        async def lookup(cred_id):
+            try:
+                found = await cache.get_or_load(cred_id, lambda: load(cred_id))
+                return found.copy()
+            except AbsentCred:
+                LOGGER.warning("messages.Credential not found: %s", cred_id)
+
+        found_creds = await asyncio.gather(*(lookup(cred_id) for cred_id in cred_ids))
+        return [cred for cred in found_creds if cred]
+
     async def _construct_proof(self, holder_id: str, proof_req: messages.ProofRequest,
                                cred_ids: set = None) -> messages.ConstructedProof:
         """
@@ -869,15 +2073,7 @@ class IndyService(ServiceBase):
         # TODO - use separate request to find credentials and allow manual filtering?
         if cred_ids:
             LOGGER.debug("Construct proof from IDs: %s", cred_ids)
-            found_creds = []
-            for cred_id in cred_ids:
-                try:
-                    found_cred_json = await holder.instance.get_cred_info_by_id(
-                        cred_id,
-                    )
-                    found_creds.append(json.loads(found_cred_json))
-                except AbsentCred:
-                    LOGGER.warning("messages.Credential not found: %s", cred_id)
+            found_creds = await self._get_creds_info(holder, cred_ids)
 
             if not found_creds:
                 raise IndyError("No credentials found for proof")
@@ -891,10 +2087,11 @@ class IndyService(ServiceBase):
             #    }
             #}
 
-            _cred_ids, found_creds_json = await holder.instance.get_cred_briefs_by_proof_req_q(
-                json.dumps(proof_req.data),
-                json.dumps(proof_req.wql_filters) if proof_req.wql_filters else None,
-            )
+            async with self._use_agent(holder):
+                _cred_ids, found_creds_json = await holder.instance.get_cred_briefs_by_proof_req_q(
+                    json.dumps(proof_req.data),
+                    json.dumps(proof_req.wql_filters) if proof_req.wql_filters else None,
+                )
             found_creds = json.loads(found_creds_json)
             _populate_cred_def_ids(proof_req.data, found_creds)
 
@@ -909,11 +2106,12 @@ class IndyService(ServiceBase):
 
         # FIXME catch exception?
         log_json("Creating proof", request_params, LOGGER)
-        proof_json = await holder.instance.create_proof(
-            proof_req.data,
-            found_creds,
-            request_params,
-        )
+        async with self._use_agent(holder):
+            proof_json = await holder.instance.create_proof(
+                proof_req.data,
+                found_creds,
+                request_params,
+            )
         proof = json.loads(proof_json)
         return messages.ConstructedProof(proof)
 
@@ -930,12 +2128,14 @@ class IndyService(ServiceBase):
         if cfg.spec_id in self._proof_specs:
             raise IndyConfigError("Duplicate proof spec ID: {}".format(cfg.spec_id))
         self._proof_specs[cfg.spec_id] = cfg
+        self._sync_dirty.add(("proof_spec", cfg.spec_id))
         return cfg.spec_id
 
     async def _sync_proof_spec(self, spec: ProofSpecCfg) -> bool:
         """
         Resolve schema information for a proof specification
         """
+        spec.template = None
         missing = spec.get_incomplete_schemas()
         check = False
         for s_key in missing:
@@ -1001,6 +2201,40 @@ class IndyService(ServiceBase):
         proof = await conn.instance.construct_proof(proof_req, cred_ids, params)
         return await self._verify_proof(verifier.agent_id, proof_req, proof)
 
+    async def _request_proof_batch(self, items: Sequence) -> messages.RequestProofBatch:
+        """
+        Request and verify a list of proofs, limiting the number processed at once
+
+        Args:
+            items: a list of dicts defining the connection_id, spec_id, and optional
+                cred_ids and params for each proof
+        """
+        #pylint: disable=broad-except
+        async def request_one(item) -> dict:
+            async with self._proof_batch_lock:
+                try:
+                    if not isinstance(item, dict):
+                        raise IndyConfigError("Expected a dict for each proof request")
+                    proof_req = await self._generate_proof_request(
+                        item.get("spec_id"), item.get("wql_filters"))
+                    with self._timer("request_proof"):
+                        verified = await self._request_proof(
+                            item.get("connection_id"), proof_req,
+                            item.get("cred_ids"), item.get("params"))
+                    return {"success": True, "result": {
+                        "verified": verified.verified,
+                        "parsed_proof": verified.parsed_proof,
+                        "proof": verified.proof.proof,
+                    }}
+                except IndyError as e:
+                    return {"success": False, "result": str(e)}
+                except Exception:
+                    LOGGER.exception("Exception during batch proof request:")
+                    return {"success": False, "result": "Exception during proof request"}
+
+        results = await asyncio.gather(*(request_one(item) for item in items))
+        return messages.RequestProofBatch(results)
+
     async def _get_filtered_credentials(self, connection_id: str, org_name: str, proof_name: str, fetch_all: bool) -> messages.OrganizationCredentials:
         """
         Gets credentials for a given organization and proof request
@@ -1114,15 +2348,23 @@ class IndyService(ServiceBase):
         """
         Request dependency graph for a credential
         """
+        # networkx is only loaded when dependencies are requested
+        import aiohttp
+        from ..common.dependencies import (
+            CredentialDependency,
+            CredentialDependencyGraph,
+            EdgeAlreadyExistsError,
+            CantResolveDidError,
+            CantConnectToEndpointError,
+            BadResponseError,
+            CircularDependencyError
+        )
         if not visited_dids:
             visited_dids = []
 
         did_agent = None
         if origin_did:
-            for agent in self._agents.values():
-                if agent.did == origin_did:
-                    did_agent = agent
-                    break
+            did_agent = self._agents_by_did.get(origin_did)
 
         if not did_agent:
             did_agent = next(iter(self._agents.values()))
@@ -1247,14 +2489,26 @@ class IndyService(ServiceBase):
 
     async def _get_endpoint(self, did: str) -> messages.Endpoint:
         """
-        Resolve a did to an endpoint
+        Resolve a did to an endpoint. Results are cached, including DIDs without
+        a registered endpoint (for a shorter period)
         """
+        agent = None
+        for check_agent in self._agents.values():
+            if check_agent.synced:
+                agent = check_agent
+                if check_agent.opened:
+                    break
+        if not agent:
+            raise IndyConfigError("No agent is synchronized to resolve endpoint")
+
+        async def load():
+            with self._timer("get_endpoint"):
+                async with self._use_agent(agent):
+                    return await agent.get_endpoint(did)
 
-        for _, agent in self._agents.items():
-            if not agent.synced:
-                raise IndyConfigError("Agent is not yet synchronized: {}".format(agent.agent_id))
-            endpoint = await agent.get_endpoint(did)
-            return messages.Endpoint(endpoint)
+        endpoint = await self._endpoint_cache.get_or_load(
+            did, load, lambda found: None if found else self._endpoint_negative_ttl)
+        return messages.Endpoint(endpoint)
 
     async def _verify_proof(self, verifier_id: str, proof_req: messages.ProofRequest,
                             proof: messages.ConstructedProof) -> messages.VerifiedProof:
@@ -1271,8 +2525,27 @@ class IndyService(ServiceBase):
             raise IndyConfigError("Unknown verifier id: {}".format(verifier_id))
         if not verifier.synced:
             raise IndyConfigError("Verifier is not yet synchronized: {}".format(verifier.agent_id))
-        result = await verifier.instance.verify_proof(proof_req.data, proof.proof)
-        parsed_proof = revealed_attrs(proof.proof)
+
+        async def verify():
+            if self._verifier_pool:
+                return await self._verifier_pool.verify_proof(proof_req.data, proof.proof)
+            for ident in proof.proof.get("identifiers") or []:
+                await self._restore_artifact(SCHEMA, ident.get("schema_id"))
+                await self._restore_artifact(CRED_DEF, ident.get("cred_def_id"))
+            async with self._use_agent(verifier):
+                result = await verifier.instance.verify_proof(proof_req.data, proof.proof)
+            return result, revealed_attrs(proof.proof)
+
+        if verifier.cache_proofs and self._proof_cache_ttl:
+            digest = hashlib.sha256(json.dumps(
+                [proof_req.data, proof.proof], sort_keys=True).encode("utf-8")).hexdigest()
+            result, parsed_proof = await self._proof_cache.get_or_load(
+                (verifier_id, digest), verify)
+        else:
+            result, parsed_proof = await verify()
+        if self._artifacts and not self._verifier_pool:
+            for kind, artifact_id, data in self._artifacts.proof_artifacts(proof.proof):
+                await self._store_artifact(kind, artifact_id, data)
         return messages.VerifiedProof(result, parsed_proof, proof)
 
     async def _resolve_nym(self, did: str, agent_id: str = None) -> messages.ResolvedNym:
@@ -1293,10 +2566,14 @@ class IndyService(ServiceBase):
             raise IndyConfigError("Unknown agent id: {}".format(agent_id))
         if not agent.synced:
             raise IndyConfigError("Agent is not yet synchronized: {}".format(agent.agent_id))
-        nym_json = await agent.instance.get_nym(did)
-        nym_info = json.loads(nym_json)
-        if not nym_info:
-            nym_info = None
+
+        async def load():
+            async with self._use_agent(agent):
+                nym_json = await agent.instance.get_nym(did)
+            return json.loads(nym_json) or None
+
+        nym_info = await self._nym_cache.get_or_load(
+            did, load, lambda found: None if found else self._nym_negative_ttl)
         return messages.ResolvedNym(did, nym_info)
 
     async def _handle_ledger_status(self):
@@ -1318,6 +2595,7 @@ class IndyService(ServiceBase):
             the initialized :class:`ClientSession` object
         """
         if "request_class" not in kwargs:
+            from didauth.ext.aiohttp import SignedRequest
             kwargs["request_class"] = SignedRequest
         if conn_id and "auth" not in kwargs:
             kwargs["auth"] = self._signed_request_auth(conn_id)
@@ -1345,6 +2623,7 @@ class IndyService(ServiceBase):
                     secret = base64.b64decode(secret)
                 else:
                     secret = bytes(secret, "ascii")
+            from didauth.ext.aiohttp import SignedRequestAuth
             ret = SignedRequestAuth(key_id, "ed25519", secret, header_list)
             if not conn.sign_target and hasattr(ret, "sign_target"):
                 ret.sign_target = False
@@ -1363,41 +2642,16 @@ class IndyService(ServiceBase):
                 text = await self._handle_ledger_status()
                 reply = messages.LedgerStatus(text)
 
-        elif isinstance(request, messages.RegisterAgentReq):
-            try:
-                agent_id = self._add_agent(request.agent_type, request.wallet_id, **request.config)
-                reply = self._get_agent_status(agent_id)
-                self._sync_required()
-            except IndyError as e:
-                reply = messages.IndyServiceFail(str(e))
-
-        elif isinstance(request, messages.RegisterConnectionReq):
+        elif isinstance(request, _REGISTER_REQUESTS):
             try:
-                connection_id = self._add_connection(
-                    request.connection_type, request.agent_id, **request.config)
-                reply = self._get_connection_status(connection_id)
+                reply = self._apply_registration(request)
                 self._sync_required()
             except IndyError as e:
                 reply = messages.IndyServiceFail(str(e))
 
-        elif isinstance(request, messages.RegisterCredentialTypeReq):
+        elif isinstance(request, messages.RegisterConfigReq):
             try:
-                self._add_credential_type(
-                    request.issuer_id,
-                    request.schema_name,
-                    request.schema_version,
-                    request.origin_did,
-                    request.attr_names,
-                    request.dependencies,
-                    request.config)
-                reply = messages.IndyServiceAck()
-            except IndyError as e:
-                reply = messages.IndyServiceFail(str(e))
-
-        elif isinstance(request, messages.RegisterWalletReq):
-            try:
-                wallet_id = self._add_wallet(**request.config)
-                reply = self._get_wallet_status(wallet_id)
+                reply = self._register_config(request.requests)
                 self._sync_required()
             except IndyError as e:
                 reply = messages.IndyServiceFail(str(e))
@@ -1414,7 +2668,8 @@ class IndyService(ServiceBase):
         elif isinstance(request, messages.IssueCredentialReq):
             try:
                 with self._timer("issue_credential"):
-                    reply = await self._issue_credential(
+                    reply = await self._issue_credential_once(
+                        request.idempotency_key,
                         request.connection_id,
                         request.schema_name,
                         request.schema_version,
@@ -1426,7 +2681,8 @@ class IndyService(ServiceBase):
         elif isinstance(request, messages.IssueCredentialBatchReq):
             try:
                 with self._timer("issue_credential"):
-                    reply = await self._issue_credential(
+                    reply = await self._issue_credential_once(
+                        request.idempotency_key,
                         request.connection_id,
                         request.schema_name,
                         request.schema_version,
@@ -1436,6 +2692,16 @@ class IndyService(ServiceBase):
             except IndyError as e:
                 reply = messages.IndyServiceFail(str(e))
 
+        elif isinstance(request, messages.IssueCredentialJobReq):
+            try:
+                reply = self._start_issue_job_once(
+                    request.idempotency_key, request.connection_id, request.credentials)
+            except IndyError as e:
+                reply = messages.IndyServiceFail(str(e))
+
+        elif isinstance(request, messages.IssueCredentialJobStatusReq):
+            reply = self._get_issue_job_status(request.job_id)
+
         elif isinstance(request, messages.GenerateCredentialRequestReq):
             try:
                 with self._timer("generate_credential_request"):
@@ -1460,6 +2726,11 @@ class IndyService(ServiceBase):
             except IndyError as e:
                 reply = messages.IndyServiceFail(str(e))
 
+        elif isinstance(request, messages.InvalidateSchemaCacheReq):
+            self._invalidate_schema_cache(
+                request.schema_name, request.schema_version, request.origin_did)
+            reply = messages.IndyServiceAck()
+
         elif isinstance(request, messages.ConstructProofReq):
             try:
                 with self._timer("construct_proof"):
@@ -1468,14 +2739,6 @@ class IndyService(ServiceBase):
             except IndyError as e:
                 reply = messages.IndyServiceFail(str(e))
 
-        elif isinstance(request, messages.RegisterProofSpecReq):
-            try:
-                spec_id = self._add_proof_spec(**request.config)
-                reply = self._get_proof_spec_status(spec_id)
-                self._sync_required()
-            except IndyError as e:
-                reply = messages.IndyServiceFail(str(e))
-
         elif isinstance(request, messages.GenerateProofRequestReq):
             try:
                 reply = await self._generate_proof_request(
@@ -1531,6 +2794,9 @@ class IndyService(ServiceBase):
             except IndyError as e:
                 reply = messages.IndyServiceFail(str(e))
 
+        elif isinstance(request, messages.RequestProofBatchReq):
+            reply = await self._request_proof_batch(request.items)
+
         elif isinstance(request, messages.VerifyProofReq):
             try:
                 with self._timer("verify_proof"):
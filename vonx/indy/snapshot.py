@@ -0,0 +1,99 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+A snapshot of the verified sync state of the :class:`IndyService`, used to skip
+ledger and connection round trips when the service is restarted
+"""
+
+import json
+import logging
+import os
+import pathlib
+
+LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class SyncSnapshot:
+    """
+    Stores agent registrations, published schemas and credential definitions, and a
+    hash of the registration submitted by each connection in a JSON file
+    """
+
+    def __init__(self, path: str, ledger_id: str):
+        """
+        Args:
+            path: the path to the snapshot file
+            ledger_id: the identifier of the ledger, so that state recorded for
+                another ledger is never restored
+        """
+        self._path = pathlib.Path(path)
+        self._ledger_id = ledger_id
+        self.agents = {}
+        self.connections = {}
+
+    @property
+    def path(self) -> pathlib.Path:
+        """
+        Accessor for the path to the snapshot file
+        """
+        return self._path
+
+    def load(self) -> bool:
+        """
+        Load the snapshot file, if present and recorded for the same ledger
+
+        Returns:
+            True if a snapshot was loaded
+        """
+        if not self._path.exists():
+            return False
+        try:
+            with self._path.open() as snap_file:
+                data = json.load(snap_file)
+        except (OSError, ValueError):
+            LOGGER.exception("Error loading sync snapshot: %s", self._path)
+            return False
+        if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION \
+                or data.get("ledger_id") != self._ledger_id:
+            LOGGER.info("Ignoring sync snapshot for another ledger: %s", self._path)
+            return False
+        self.agents = data.get("agents") or {}
+        self.connections = data.get("connections") or {}
+        return True
+
+    def save(self) -> None:
+        """
+        Write the snapshot file, replacing the previous version atomically
+        """
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "ledger_id": self._ledger_id,
+            "agents": self.agents,
+            "connections": self.connections,
+        }
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        try:
+            if not self._path.parent.exists():
+                self._path.parent.mkdir(parents=True)
+            with tmp_path.open("w") as snap_file:
+                json.dump(data, snap_file)
+            os.replace(str(tmp_path), str(self._path))
+        except OSError:
+            LOGGER.exception("Error saving sync snapshot: %s", self._path)
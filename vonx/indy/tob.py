@@ -122,8 +122,8 @@ class TobConnection(HttpConnection):
         """
         Submit the issuer JSON definition to TheOrgBook to register our service
         """
-        if self.agent_type == "issuer":
-            spec = assemble_issuer_spec(self.agent_params)
+        spec = self.sync_spec()
+        if spec:
             log_json("Issuer spec:", spec, LOGGER)
             response = await self.post_json(
                 "indy/register-issuer", spec
@@ -136,6 +136,14 @@ class TobConnection(HttpConnection):
                     response,
                 )
 
+    def sync_spec(self) -> dict:
+        """
+        Get the issuer JSON definition submitted to TheOrgBook
+        """
+        if self.agent_type == "issuer":
+            return assemble_issuer_spec(self.agent_params)
+        return None
+
     @property
     def path_prefix(self):
         return "indy/"
@@ -0,0 +1,193 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Worker processes used by the :class:`IndyService` to verify proofs outside of
+the main service process
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing as mp
+
+from von_anchor.nodepool import NodePool
+from von_anchor.util import revealed_attrs
+
+from .artifacts import LedgerArtifactCache
+from .config import AgentCfg, AgentType, WalletCfg
+from .errors import IndyError
+
+LOGGER = logging.getLogger(__name__)
+
+# state of the verifier within each worker process
+_WORKER = None
+
+
+class _VerifierWorker:
+    """
+    The ledger connection and verifier agent owned by a single worker process
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.agent = None
+        self.artifacts = None
+        self.loop = asyncio.new_event_loop()
+        self.pool = None
+        self.wallet = None
+
+    async def open(self) -> None:
+        """
+        Open the node pool and create the verifier agent on first use
+        """
+        if self.agent:
+            return
+        ident = mp.current_process()._identity #pylint: disable=protected-access
+        name = "{}-verifier-{}".format(self.config["name"], ident[0] if ident else 0)
+        self.pool = NodePool(name, self.config["genesis_path"], self.config.get("pool_cfg"))
+        await self.pool.open()
+        if self.config.get("ledger_cache_path") and self.config.get("ledger_id"):
+            self.artifacts = LedgerArtifactCache(
+                self.config["ledger_cache_path"], self.config["ledger_id"])
+            self.artifacts.preload()
+        seed = hashlib.sha256(name.encode("utf-8")).hexdigest()[:32]
+        self.wallet = WalletCfg(name=name, seed=seed)
+        await self.wallet.create()
+        agent = AgentCfg(AgentType.verifier.value, name, id=name)
+        await agent.create(self.wallet, self.pool)
+        self.agent = agent
+        LOGGER.info("Started verifier worker: %s", name)
+
+    async def verify_proof(self, proof_req: dict, proof: dict) -> tuple:
+        """
+        Verify a proof and extract the revealed attributes
+        """
+        await self.open()
+        if self.artifacts:
+            self.artifacts.restore_proof_artifacts(proof)
+        result = await self.agent.instance.verify_proof(proof_req, proof)
+        if self.artifacts:
+            self.artifacts.store_proof_artifacts(proof)
+        return result, revealed_attrs(proof)
+
+
+def _init_worker(config: dict) -> None:
+    """
+    Initialize a newly-started worker process
+    """
+    global _WORKER #pylint: disable=global-statement
+    _WORKER = _VerifierWorker(config)
+
+
+def _verify_proof(proof_req: dict, proof: dict) -> tuple:
+    """
+    Verify a proof within a worker process
+    """
+    #pylint: disable=broad-except
+    try:
+        return _WORKER.loop.run_until_complete(_WORKER.verify_proof(proof_req, proof))
+    except IndyError:
+        raise
+    except Exception as e:
+        # exceptions from the indy library may not be safe to pickle
+        raise IndyError("Error verifying proof: {}".format(e)) from None
+
+
+class VerifierPool:
+    """
+    A pool of worker processes, each with its own verifier agent, which check
+    proofs in parallel with the service process
+    """
+
+    def __init__(self, workers: int, config: dict):
+        """
+        Args:
+            workers: the number of worker processes to start
+            config: the name, genesis_path and optional pool_cfg of the ledger connection,
+                and the optional ledger_cache_path and ledger_id of the artifact cache
+        """
+        self._config = config
+        self._pool = None
+        self._workers = workers
+        self.pending = 0
+
+    @property
+    def workers(self) -> int:
+        """
+        Accessor for the number of worker processes
+        """
+        return self._workers
+
+    def start(self) -> None:
+        """
+        Start the worker processes
+        """
+        if not self._pool:
+            ctx = mp.get_context("spawn")
+            self._pool = ctx.Pool(self._workers, _init_worker, (self._config,))
+
+    def stop(self) -> None:
+        """
+        Stop the worker processes
+        """
+        if self._pool:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    async def verify_proof(self, proof_req: dict, proof: dict) -> tuple:
+        """
+        Verify a proof using one of the worker processes
+
+        Args:
+            proof_req: the proof request data
+            proof: the constructed proof
+        Returns:
+            the verification result and the revealed attributes of the proof
+        """
+        self.start()
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def done(result):
+            if not future.done():
+                future.set_result(result)
+
+        def failed(exc):
+            if not future.done():
+                future.set_exception(exc)
+
+        self.pending += 1
+        try:
+            self._pool.apply_async(
+                _verify_proof, (proof_req, proof),
+                callback=lambda result: loop.call_soon_threadsafe(done, result),
+                error_callback=lambda exc: loop.call_soon_threadsafe(failed, exc))
+            return await future
+        finally:
+            self.pending -= 1
+
+    @property
+    def stats(self) -> dict:
+        """
+        Get the number of workers and pending verifications
+        """
+        return {
+            "workers": self._workers,
+            "pending": self.pending,
+        }
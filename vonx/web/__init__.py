@@ -24,17 +24,18 @@ import json
 import os
 
 from aiohttp import web
-import aiohttp_jinja2
-from jinja2 import ChoiceLoader, FileSystemLoader, PackageLoader
 
 from ..common.manager import ConfigServiceManager
 from .routes import get_routes
 
 
-def _setup_jinja(manager: ConfigServiceManager, app: web.Application):
+def _setup_jinja(manager: ConfigServiceManager, app: web.Application, preload: bool = False):
     """
-    Initialize aiohttp-jinja2 for template rendering
+    Initialize aiohttp-jinja2 for template rendering, optionally compiling all
+    of the templates in advance
     """
+    import aiohttp_jinja2
+    from jinja2 import ChoiceLoader, FileSystemLoader, PackageLoader
 
     tpl_path = manager.env.get('TEMPLATE_PATH')
     if not tpl_path:
@@ -49,12 +50,19 @@ def _setup_jinja(manager: ConfigServiceManager, app: web.Application):
             FileSystemLoader(tpl_path)
         ])
     filters = {"jsonify": json.dumps}
-    aiohttp_jinja2.setup(app, loader=loader, filters=filters)
+    env = aiohttp_jinja2.setup(app, loader=loader, filters=filters)
+    if preload:
+        for tpl_name in env.list_templates(extensions=("html",)):
+            env.get_template(tpl_name)
 
 
-async def init_web(manager: ConfigServiceManager):
+async def init_web(manager: ConfigServiceManager, preload_templates: bool = False):
     """
     Initialize the web server application
+
+    Args:
+        manager: the service manager for the application
+        preload_templates: whether to compile all templates during initialization
     """
     base = manager.env.get('WEB_BASE_HREF', '/')
 
@@ -63,7 +71,11 @@ async def init_web(manager: ConfigServiceManager):
     app['manager'] = manager
     app['static_root_url'] = base + 'assets'
     app.add_routes(get_routes(app))
-    _setup_jinja(manager, app)
+    registry = app.get('form_registry')
+    if registry and registry.reloadable:
+        # forms added after startup are served once no other route has matched
+        app.middlewares.append(registry.middleware(base))
+    _setup_jinja(manager, app, preload_templates)
 
     if base != '/':
         root_app = web.Application()
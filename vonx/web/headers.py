@@ -20,14 +20,14 @@ Abstractions to remove direct client dependency on didauth library
 """
 
 import logging
-import time
 from typing import Mapping
 
-from didauth.base import KeyFinderBase, StaticKeyFinder
+from didauth.base import KeyFinderBase
 from didauth.error import VerifierException
 from didauth.headers import HeaderVerifier
 from didauth.utils import decode_string
 
+from vonx.common.cache import TTLCache
 from vonx.indy.client import IndyClient
 from vonx.indy.errors import IndyError
 
@@ -86,24 +86,37 @@ class IndyKeyFinder(KeyFinderBase):
         return None
 
 
-class KeyCache(StaticKeyFinder):
-    def __init__(self, source: KeyFinderBase, expiry=600):
-        super(KeyCache, self).__init__(source, True)
-        self._expiry = expiry
-        self._updated = {}
+class KeyCache(KeyFinderBase):
+    """
+    A bounded cache of public keys in front of another key finder. Keys are retained
+    for the expiry period and refreshed in the background when frequently used, and
+    concurrent lookups of the same missing key share a single request
+    """
+
+    def __init__(self, source: KeyFinderBase, expiry=600, max_size=1000, negative_expiry=60):
+        super(KeyCache, self).__init__(source)
+        self._cache = TTLCache(max_size, expiry, expiry / 5 if expiry else None)
+        self._negative_expiry = negative_expiry
+        self._key_source = source
+
+    @property
+    def stats(self) -> dict:
+        """
+        Accessor for the cache statistics
+        """
+        return self._cache.stats
 
     def add_key(self, key_id: str, key_type: str, key: bytes):
-        super(KeyCache, self).add_key(key_id, key_type, key)
-        if key:
-            self._updated[key] = time.time()
+        self._cache.set((key_id, key_type), key)
+
+    async def find_key(self, key_id: str, key_type: str) -> bytes:
+        return await self._lookup_key(key_id, key_type)
 
     async def _lookup_key(self, key_id: str, key_type: str) -> bytes:
-        key = await super(KeyCache, self)._lookup_key(key_id, key_type)
-        if key and self._expiry and key in self._updated and \
-                self._updated[key] + self._expiry < time.time():
-            LOGGER.debug("Ignoring expired cache key")
-            key = None
-        return key
+        return await self._cache.get_or_load(
+            (key_id, key_type),
+            lambda: self._key_source.find_key(key_id, key_type),
+            lambda key: None if key else self._negative_expiry)
 
 
 __all__ = ('IndyKeyFinder', 'KeyCache', 'KeyFinderBase', 'verify_signature')
@@ -0,0 +1,217 @@
+#
+# Copyright 2017-2018 Government of Canada
+# Public Services and Procurement Canada - buyandsell.gc.ca
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Run the web server in worker processes forked from a parent which has already
+loaded the configuration, routes, templates and schemas, so that the memory used
+by them is shared between the workers
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+
+from aiohttp import web
+
+from ..common.manager import ConfigServiceManager
+from . import init_web
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _listen(host: str, port: int, reuse_port: bool) -> socket.socket:
+    """
+    Create a listening socket for the web server
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(socket.SOMAXCONN)
+    sock.setblocking(False)
+    return sock
+
+
+class PreforkServer:
+    """
+    Start a number of aiohttp worker processes sharing one listening address. Each
+    worker creates its own :class:`RequestExecutor` to communicate with the services
+    """
+
+    def __init__(self, manager: ConfigServiceManager, host: str = "0.0.0.0",
+                 port: int = 8000, workers: int = None, reuse_port: bool = None):
+        """
+        Args:
+            manager: the started service manager
+            host: the address to listen on
+            port: the port to listen on
+            workers: the number of worker processes, defaulting to WEB_WORKERS
+                or the number of CPUs
+            reuse_port: whether each worker binds its own socket using SO_REUSEPORT,
+                letting the kernel balance connections. Otherwise the workers accept
+                connections from a single socket bound by the parent
+        """
+        env = manager.env
+        if reuse_port is None:
+            reuse_port = hasattr(socket, "SO_REUSEPORT") and \
+                str(env.get("WEB_REUSE_PORT", 1)).lower() not in ("0", "false")
+        self._app = None
+        self._host = host
+        self._manager = manager
+        self._pids = {}
+        self._port = port
+        self._reuse_port = reuse_port
+        self._sock = None
+        self._start_timeout = float(env.get("WEB_START_TIMEOUT", 300))
+        self._stopping = False
+        self._workers = workers or int(env.get("WEB_WORKERS", 0)) or os.cpu_count() or 1
+
+    def prepare(self) -> None:
+        """
+        Load the application in the parent process and freeze the heap, so that
+        garbage collection in the workers does not touch the shared pages
+        """
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(self._wait_started(self._start_timeout))
+        self._app = loop.run_until_complete(init_web(self._manager, preload_templates=True))
+        if not self._reuse_port:
+            self._sock = _listen(self._host, self._port, False)
+        self._freeze()
+
+    async def _wait_started(self, timeout: float = 300) -> None:
+        """
+        Wait for the service manager to start, and for the Indy service (if any) to
+        finish registering and synchronizing the configuration, so that the workers
+        are forked from a parent with the configuration loaded
+        """
+        start = time.perf_counter()
+        while time.perf_counter() - start < timeout:
+            status = await self._manager.get_service_status("manager")
+            if status.get("started"):
+                if not self._manager.get_service("indy"):
+                    return
+                status = await self._manager.get_service_status("indy")
+                if status.get("synced"):
+                    return
+                if status.get("failed"):
+                    LOGGER.warning("Indy service failed to start, forking web workers anyway")
+                    return
+            await asyncio.sleep(0.5)
+        LOGGER.warning("Services not synchronized, forking web workers anyway")
+
+    @staticmethod
+    def _freeze() -> None:
+        """
+        Move all current objects into the permanent generation (Python 3.7+)
+        """
+        gc.collect()
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+
+    def run(self) -> None:
+        """
+        Fork the worker processes and restart any which exit, until a SIGINT or
+        SIGTERM is received
+        """
+        if not self._app:
+            self.prepare()
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        LOGGER.info("Starting %d web workers on %s:%d", self._workers, self._host, self._port)
+        for index in range(self._workers):
+            self._spawn(index)
+        while self._pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = self._pids.pop(pid, None)
+            self._manager.remove_worker(pid)
+            if index is not None and not self._stopping:
+                LOGGER.warning("Web worker %d exited with status %d, restarting", pid, status)
+                time.sleep(1)
+                self._freeze()
+                self._spawn(index)
+        if self._sock:
+            self._sock.close()
+        LOGGER.info("Web workers stopped")
+
+    def _handle_stop(self, _signum, _frame) -> None:
+        """
+        Stop the worker processes
+        """
+        self._stopping = True
+        for pid in list(self._pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self, index: int) -> None:
+        """
+        Fork a new worker process
+        """
+        pid = os.fork()
+        if pid:
+            self._pids[pid] = index
+            self._manager.add_worker(pid)
+            return
+        status = 0
+        try:
+            self._run_worker()
+        except Exception:  #pylint: disable=broad-except
+            LOGGER.exception("Error in web worker")
+            status = 1
+        finally:
+            os._exit(status)  #pylint: disable=protected-access
+
+    def _run_worker(self) -> None:
+        """
+        Serve requests in the worker process
+        """
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        # replace the event loop after fork. The inherited loop is not closed, as
+        # that would remove its descriptors from the selector shared with the parent
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        # start the request executor for this process before accepting connections
+        _executor = self._manager.executor
+        sock = self._sock
+        if self._reuse_port:
+            sock = _listen(self._host, self._port, True)
+        web.run_app(self._app, sock=sock, print=None)
+
+
+def run_prefork(manager: ConfigServiceManager, host: str = "0.0.0.0", port: int = 8000,
+                workers: int = None) -> None:
+    """
+    Run the web server for a started service manager in several worker processes
+
+    Args:
+        manager: the started service manager
+        host: the address to listen on
+        port: the port to listen on
+        workers: the number of worker processes, defaulting to WEB_WORKERS
+            or the number of CPUs
+    """
+    PreforkServer(manager, host, port, workers).run()
@@ -23,7 +23,6 @@ Handle rendering of issue-credential forms
 import logging
 
 from aiohttp import web
-import aiohttp_jinja2
 
 from ..common.util import log_json, normalize_credential_ids
 from ..indy.errors import IndyClientError
@@ -120,4 +119,5 @@ async def render_form(form: dict, request: web.Request) -> web.Response:
     tpl_vars["inputs"]["connection_id"] = form.get("connection_id", "")
     tpl_vars["path"] = request.rel_url
 
+    import aiohttp_jinja2
     return aiohttp_jinja2.render_template(tpl_name, request, tpl_vars)
@@ -20,9 +20,11 @@ Define routes for the aiohttp webserver application based on the defined configu
 """
 
 import logging
+import os
+import time
 from typing import Coroutine
 
-from aiohttp import web, ClientRequest
+from aiohttp import web
 
 from ..common.manager import ConfigServiceManager
 from . import views
@@ -45,8 +47,11 @@ def get_standard_routes(_app) -> list:
         web.post('/get-credential-dependencies', views.get_credential_dependencies),
         web.post('/issue-credential', views.issue_credential),
         web.post('/{connection_id}/issue-credential', views.issue_credential),
+        web.get('/issue-credential/job/{job_id}', views.issue_credential_job,
+                name='issue-credential-job'),
         web.post('/request-proof', views.request_proof),
         web.post('/{connection_id}/request-proof', views.request_proof),
+        web.post('/request-proof-batch', views.request_proof_batch),
         web.post('/{holder_id}/generate-credential-request', views.generate_credential_request),
         web.post('/{holder_id}/store-credential', views.store_credential),
         web.post('/{holder_id}/construct-proof', views.construct_proof),
@@ -59,7 +64,19 @@ def get_custom_routes(app: web.Application) -> list:
     """
     Get the list of routes defined by the application route settings
     """
-    return RouteDefinitions.load(app['manager']).routes
+    manager = app['manager']
+    reload_triggered = bool(
+        manager.env.get('CONFIG_RELOAD_SIGNAL') or manager.env.get('CONFIG_RELOAD_ENDPOINT'))
+    registry = FormRegistry(
+        manager, float(manager.env.get('ROUTES_RELOAD_INTERVAL', 0)), reload_triggered)
+    app['form_registry'] = registry
+    routes = registry.routes
+    if manager.env.get('CONFIG_RELOAD_ENDPOINT'):
+        if manager.env.get('CONFIG_RELOAD_TOKEN'):
+            routes.append(web.post('/reload-config', views.reload_config))
+        else:
+            LOGGER.warning("CONFIG_RELOAD_TOKEN must be set to enable /reload-config")
+    return routes
 
 
 def get_routes(app: web.Application) -> list:
@@ -166,6 +183,133 @@ class RouteDefinitions:
         return routes
 
 
+class FormRegistry:
+    """
+    Keeps the form route definitions in sync with the route configuration, so that
+    changes to forms are applied without restarting the web server
+    """
+    def __init__(self, manager: ConfigServiceManager, check_interval: float = 0,
+                 follow_reloads: bool = False):
+        """
+        Args:
+            manager: the manager used to load the route configuration
+            check_interval: the minimum number of seconds between checks for a
+                modified configuration file, or zero to disable the check
+            follow_reloads: whether to reload the form definitions whenever the
+                manager reloads its configuration
+        """
+        self._manager = manager
+        self._check_interval = check_interval
+        self._checked = 0
+        self._follow_reloads = follow_reloads
+        self._forms = {}
+        self._generation = None
+        self._mtime = None
+        self._path = manager.config_path('ROUTES_CONFIG_PATH', 'routes.yml')
+        self.reload()
+
+    @property
+    def reloadable(self) -> bool:
+        """
+        Check whether the form definitions may change after startup
+        """
+        return self._follow_reloads or self._check_interval > 0
+
+    def _config_mtime(self) -> float:
+        try:
+            return os.stat(self._path).st_mtime
+        except OSError:
+            return None
+
+    def reload(self) -> None:
+        """
+        Load the form definitions from the route configuration
+        """
+        generation = self._manager.config_generation
+        mtime = self._config_mtime()
+        definitions = RouteDefinitions.load(self._manager)
+        self._forms = {form['path']: form for form in definitions.forms}
+        self._generation = generation
+        self._mtime = mtime
+        self._checked = time.monotonic()
+
+    def check(self) -> None:
+        """
+        Reload the form definitions if the manager has reloaded its configuration,
+        or if the route configuration file has been modified
+        """
+        #pylint: disable=broad-except
+        if not self.reloadable:
+            return
+        generation = self._manager.config_generation
+        if self._follow_reloads and generation != self._generation:
+            LOGGER.info("Reloading route configuration after configuration reload")
+        else:
+            if self._check_interval <= 0:
+                return
+            now = time.monotonic()
+            if now - self._checked < self._check_interval:
+                return
+            self._checked = now
+            mtime = self._config_mtime()
+            if mtime == self._mtime:
+                return
+            LOGGER.info("Reloading route configuration: %s", self._path)
+        try:
+            self.reload()
+        except Exception:
+            LOGGER.exception("Error reloading route configuration")
+            # keep the current forms until the next reload or modification
+            self._generation = generation
+            self._mtime = self._config_mtime()
+
+    def find(self, path: str) -> dict:
+        """
+        Find the current form definition for a route path
+        """
+        self.check()
+        return self._forms.get(path)
+
+    @property
+    def routes(self) -> list:
+        """
+        Accessor for the routes of the forms defined at startup. Each request is
+        handled by the current definition of the form
+        """
+        return [
+            web.view(path, form_handler(self.form_getter(path)), name=form['name'])
+            for path, form in self._forms.items()]
+
+    def form_getter(self, path: str):
+        """
+        Return a function to look up the current form definition for a path
+        """
+        return lambda: self.find(path)
+
+    def middleware(self, base_href: str = '/'):
+        """
+        Return a middleware serving the forms added after startup. Only requests
+        which did not match any route are checked against the current form paths,
+        so routes added by the application are never shadowed
+
+        Args:
+            base_href: the base path of the application
+        """
+        prefix = base_href.rstrip('/')
+
+        @web.middleware
+        async def _added_forms(request: web.Request, handler):
+            if isinstance(request.match_info.http_exception, web.HTTPNotFound):
+                path = request.path
+                if prefix and path.startswith(prefix):
+                    path = path[len(prefix):]
+                form = self.find(path)
+                if form:
+                    return await _process_form(form, request)
+            return await handler(request)
+        return _added_forms
+
+
 def check_form_definition(form: dict) -> None:
     """
     Verify a form definition and expand properties as required
@@ -180,14 +324,27 @@ def check_form_definition(form: dict) -> None:
         raise ValueError('Unknown form type for {}: {}'.format(form_id, form_type))
 
 
-def form_handler(form: dict) -> Coroutine:
+async def _process_form(form: dict, request: web.Request):
+    """
+    Render or process a form depending on the request method
+    """
+    if request.method == 'GET' or request.method == 'HEAD':
+        return await render_form(form, request)
+    elif request.method == 'POST':
+        return await process_form(form, request)
+    return web.Response(status=405)
+
+
+def form_handler(form) -> Coroutine:
     """
     Return a request handler for processing form routes
+
+    Args:
+        form: the form definition, or a function returning the current definition
     """
-    async def _process(request: ClientRequest):
-        if request.method == 'GET' or request.method == 'HEAD':
-            return await render_form(form, request)
-        elif request.method == 'POST':
-            return await process_form(form, request)
-        return web.Response(status=405)
+    async def _process(request: web.Request):
+        current = form() if callable(form) else form
+        if not current:
+            raise web.HTTPNotFound()
+        return await _process_form(current, request)
     return _process
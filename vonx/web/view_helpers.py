@@ -1,18 +1,22 @@
 import asyncio
 from collections import OrderedDict
 from concurrent.futures import Future
+import hashlib
 import json
 import logging
+from typing import TYPE_CHECKING
 
 from aiohttp import web
 
 from ..common.exchange import RequestTarget
 from ..indy.client import IndyClient, IndyClientError
-from ..indy.errors import IndyError
+from ..indy.errors import IndyError, IndyIdempotencyConflict
 from ..indy.messages import Credential, StoredCredential
-from ..indy.manager import IndyManager
 
-from .headers import KeyFinderBase, verify_signature
+if TYPE_CHECKING:
+    # the manager and didauth are not loaded by web workers unless used
+    from ..indy.manager import IndyManager
+    from .headers import KeyFinderBase
 
 LOGGER = logging.getLogger(__name__)
 
@@ -70,7 +74,7 @@ class IndyCredentialProcessor:
         pass
 
 
-def get_manager(request: web.Request) -> IndyManager:
+def get_manager(request: web.Request) -> 'IndyManager':
     """
     Fetch the service manager for the current application
     """
@@ -129,10 +133,11 @@ def get_handle_id(request: web.Request, handle: str, override_val: str = None) -
     return query_val
 
 async def check_request_signature(
-        request: web.Request, key_finder: KeyFinderBase, required: bool = False):
+        request: web.Request, key_finder: 'KeyFinderBase', required: bool = False):
     """
     Check the DID-auth signature on the incoming request
     """
+    from .headers import verify_signature
     if request.get("didauth"):
         return True, request["didauth"]
     auth = None
@@ -177,14 +182,16 @@ def _assemble_cred_from_input(params: dict):
 
 async def _issue_credential(
         client: IndyClient, connection_id: str,
-        schema_name, schema_version, attribs, batch: bool = False):
+        schema_name, schema_version, attribs, batch: bool = False,
+        idempotency_key: str = None):
     """
     Issue a single credential or batch of credentials
     """
     try:
         if batch:
             batch = await client.issue_credential_batch(
-                connection_id, schema_name, schema_version, None, attribs)
+                connection_id, schema_name, schema_version, None, attribs,
+                idempotency_key)
             stored = []
             result = []
             erridx = 0
@@ -202,10 +209,13 @@ async def _issue_credential(
                 result.append(row)
         else:
             stored = await client.issue_credential(
-                connection_id, schema_name, schema_version, None, attribs)
+                connection_id, schema_name, schema_version, None, attribs,
+                idempotency_key)
             result = {"success": True, "result": stored.cred_id}
             if stored.served_by:
                 result["served_by"] = stored.served_by
+    except IndyIdempotencyConflict as e:
+        raise IndyRequestError(str(e), status=422) from None
     except IndyClientError as e:
         stored = None
         result = {"success": False, "result": str(e)}
@@ -215,8 +225,43 @@ async def _issue_credential(
     return stored, result
 
 
+def _check_credential_input(cred):
+    """
+    Validate a single credential definition from a list of credentials to be issued
+    """
+    if not isinstance(cred, dict):
+        raise IndyRequestError("Expected JSON object")
+    if "schema" not in cred:
+        raise IndyRequestError("Missing 'schema' property")
+    if not isinstance(cred.get("attributes"), dict):
+        raise IndyRequestError("Missing or non-dictionary 'attributes' property")
+
+
+def get_idempotency_key(request: web.Request, connection_id: str, params,
+                        schema_name=None, schema_version=None) -> str:
+    """
+    Determine the idempotency key for an issue credential request. The client may
+    provide one using the `Idempotency-Key` header, otherwise a hash of the request
+    content is used if enabled by the `IDEMPOTENCY_CONTENT_HASH` setting
+    """
+    key = request.headers.get("Idempotency-Key")
+    if key:
+        return key.strip()
+    flag = get_manager(request).env.get("IDEMPOTENCY_CONTENT_HASH")
+    if flag and str(flag).lower() not in ("0", "false"):
+        content = json.dumps({
+            "connection_id": connection_id,
+            "schema": schema_name,
+            "version": schema_version,
+            "params": params,
+        }, sort_keys=True)
+        return "sha256:" + hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return None
+
+
 async def perform_issue_credential(
-        client: IndyClient, connection_id: str, params, schema_name=None, schema_version=None):
+        client: IndyClient, connection_id: str, params, schema_name=None, schema_version=None,
+        idempotency_key: str = None):
     """
     Parse request body into credential details and perform issuing
     """
@@ -225,12 +270,7 @@ async def perform_issue_credential(
         processed = {}
         orig_pos = []
         for cred in params:
-            if not isinstance(cred, dict):
-                raise IndyRequestError("Expected JSON object")
-            if "schema" not in cred:
-                raise IndyRequestError("Missing 'schema' property")
-            if not isinstance(cred.get("attributes"), dict):
-                raise IndyRequestError("Missing or non-dictionary 'attributes' property")
+            _check_credential_input(cred)
             key = (cred["schema"], cred.get("version"))
             if key not in queue:
                 queue[key] = []
@@ -238,7 +278,7 @@ async def perform_issue_credential(
             queue[key].append(cred["attributes"])
         for key, attribs in queue.items():
             processed[key] = await _issue_credential(
-                client, connection_id, key[0], key[1], attribs, True)
+                client, connection_id, key[0], key[1], attribs, True, idempotency_key)
         stored = []
         result = []
         for key, pos in orig_pos:
@@ -253,7 +293,55 @@ async def perform_issue_credential(
             raise IndyRequestError(
                 "Request body must contain the credential attributes as a JSON object")
         return await _issue_credential(
-            client, connection_id, schema_name, schema_version, params)
+            client, connection_id, schema_name, schema_version, params,
+            idempotency_key=idempotency_key)
+
+
+async def perform_issue_credential_job(
+        client: IndyClient, connection_id: str, params, schema_name=None, schema_version=None,
+        idempotency_key: str = None):
+    """
+    Parse request body into credential details and start an issuance job
+    """
+    if isinstance(params, list):
+        creds = []
+        for cred in params:
+            _check_credential_input(cred)
+            creds.append({
+                "schema_name": cred["schema"],
+                "schema_version": cred.get("version"),
+                "attributes": cred["attributes"],
+            })
+    else:
+        if not schema_name:
+            raise IndyRequestError("Missing 'schema' parameter")
+        elif not isinstance(params, dict):
+            raise IndyRequestError(
+                "Request body must contain the credential attributes as a JSON object")
+        creds = [{
+            "schema_name": schema_name,
+            "schema_version": schema_version,
+            "attributes": params,
+        }]
+    try:
+        status = await client.start_issue_credential_job(
+            connection_id, creds, idempotency_key)
+    except IndyIdempotencyConflict as e:
+        raise IndyRequestError(str(e), status=422) from None
+    except IndyClientError as e:
+        raise IndyRequestError(str(e)) from None
+    return status
+
+
+def is_async_request(request: web.Request) -> bool:
+    """
+    Check whether the client has asked for a request to be processed asynchronously
+    """
+    flag = request.query.get("async")
+    if flag is not None:
+        return flag.lower() not in ("", "0", "false")
+    prefer = request.headers.get("Prefer") or ""
+    return "respond-async" in [pref.strip() for pref in prefer.split(",")]
 
 
 async def _store_credential(
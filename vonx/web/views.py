@@ -20,21 +20,27 @@
 View classes for handling AJAX requests as an issuer or holder service
 """
 
+import asyncio
+import hmac
 import json
 import logging
 
 from aiohttp import web
 
+from ..common.service import ReloadConfigReq, ServiceFail
 from ..common.util import log_json, normalize_credential_ids
 from ..indy.client import IndyClientError
 
 from .view_helpers import (
     IndyRequestError,
     get_handle_id,
+    get_idempotency_key,
     get_manager,
     get_request_json,
     indy_client,
+    is_async_request,
     perform_issue_credential,
+    perform_issue_credential_job,
     perform_store_credential,
     service_request,
 )
@@ -61,6 +67,26 @@ async def status(request: web.Request) -> web.Response:
     return web.json_response(result)
 
 
+async def reload_config(request: web.Request) -> web.Response:
+    """
+    Reload the services and route configuration, applying any changes without
+    restarting the application. Each web worker reloads its form definitions when
+    it next handles a form request. The request must provide the CONFIG_RELOAD_TOKEN
+    setting as a bearer token
+    """
+    token = get_manager(request).env.get('CONFIG_RELOAD_TOKEN')
+    auth = request.headers.get('Authorization') or ''
+    if not token or not hmac.compare_digest(
+            auth.encode('utf-8'), 'Bearer {}'.format(token).encode('utf-8')):
+        return web.json_response(
+            {"success": False, "result": "Not authorized"}, status=401,
+            headers={"WWW-Authenticate": "Bearer"})
+    result = await service_request(request, 'manager', ReloadConfigReq())
+    if isinstance(result, ServiceFail):
+        return web.json_response({"success": False, "result": result.value}, status=400)
+    return web.json_response({"success": True})
+
+
 async def ledger_status(request: web.Request) -> web.Response:
     """
     Respond with the status JSON retrieved from the Indy ledger (von-network)
@@ -84,7 +110,9 @@ async def hello(request: web.Request) -> web.Response:
 
 async def issue_credential(request: web.Request, connection_id: str = None) -> web.Response:
     """
-    Ask the Indy service to issue a credential to the Connection
+    Ask the Indy service to issue a credential to the Connection.
+    When the `async` query parameter or a `Prefer: respond-async` header is provided,
+    respond immediately with HTTP code 202 and the identifier of the issuance job
     """
     try:
         connection_id = get_handle_id(request, "connection_id", connection_id)
@@ -92,8 +120,19 @@ async def issue_credential(request: web.Request, connection_id: str = None) -> w
         params = await get_request_json(request)
         schema_name = request.query.get("schema")
         schema_version = request.query.get("version")
+        idempotency_key = get_idempotency_key(
+            request, connection_id, params, schema_name, schema_version)
+        if is_async_request(request):
+            job = await perform_issue_credential_job(
+                client, connection_id, params, schema_name, schema_version, idempotency_key)
+            location = request.app.router["issue-credential-job"].url_for(
+                job_id=job["job_id"])
+            return web.json_response(
+                {"success": True, "result": job},
+                status=202,
+                headers={"Location": str(location)})
         stored, ret = await perform_issue_credential(
-            client, connection_id, params, schema_name, schema_version)
+            client, connection_id, params, schema_name, schema_version, idempotency_key)
     except IndyRequestError as e:
         return e.response
 
@@ -102,6 +141,18 @@ async def issue_credential(request: web.Request, connection_id: str = None) -> w
     return response
 
 
+async def issue_credential_job(request: web.Request) -> web.Response:
+    """
+    Respond with the progress and per-credential results of an issuance job
+    """
+    job_id = request.match_info.get("job_id")
+    try:
+        result = await indy_client(request).get_issue_credential_job(job_id)
+    except IndyClientError as e:
+        return web.json_response({"success": False, "result": str(e)}, status=404)
+    return web.json_response({"success": True, "result": result})
+
+
 async def request_proof(request: web.Request, connection_id: str = None) -> web.Response:
     """
     Ask the Indy service to fetch a proof from the Connection
@@ -137,6 +188,64 @@ async def request_proof(request: web.Request, connection_id: str = None) -> web.
     return web.json_response(ret)
 
 
+async def request_proof_batch(request: web.Request) -> web.StreamResponse:
+    """
+    Ask the Indy service to fetch and verify a list of proofs. The request body
+    must be a list of objects defining the `connection_id`, proof `name`, and optional
+    `credential_ids` and `params` of each proof. Results are streamed as they become
+    available, one JSON object per line including the `index` of the original item
+    """
+    try:
+        inputs = await get_request_json(request)
+        if isinstance(inputs, dict):
+            inputs = inputs.get("items")
+        if not isinstance(inputs, list):
+            raise IndyRequestError("Request body must contain a list of proof requests")
+        items = []
+        for idx, item in enumerate(inputs):
+            if not isinstance(item, dict):
+                raise IndyRequestError("Expected JSON object for item {}".format(idx))
+            if not item.get("connection_id"):
+                raise IndyRequestError("Missing 'connection_id' for item {}".format(idx))
+            if not item.get("name"):
+                raise IndyRequestError("Missing 'name' for item {}".format(idx))
+            params = item.get("params") or {}
+            if not isinstance(params, dict):
+                raise IndyRequestError("Parameter 'params' must be an object")
+            items.append({
+                "connection_id": item["connection_id"],
+                "spec_id": item["name"],
+                "cred_ids": normalize_credential_ids(item.get("credential_ids")),
+                "params": params,
+            })
+    except IndyRequestError as e:
+        return e.response
+
+    client = indy_client(request)
+    chunk_size = max(int(get_manager(request).env.get("PROOF_BATCH_CHUNK_SIZE", 20)), 1)
+
+    async def request_chunk(start):
+        try:
+            results = await client.request_proof_batch(items[start:start + chunk_size])
+        except IndyClientError as e:
+            results = [{"success": False, "result": str(e)}] * \
+                len(items[start:start + chunk_size])
+        return start, results
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+    pending = [request_chunk(start) for start in range(0, len(items), chunk_size)]
+    for next_chunk in asyncio.as_completed(pending):
+        start, results = await next_chunk
+        lines = []
+        for idx, row in enumerate(results):
+            row = dict(row, index=start + idx)
+            lines.append(json.dumps(row) + "\n")
+        await response.write("".join(lines).encode("utf-8"))
+    await response.write_eof()
+    return response
+
+
 async def generate_credential_request(request, holder_id: str = None):
     """
     Processes a credential definition and responds with a credential request